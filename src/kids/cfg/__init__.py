@@ -1,15 +1,36 @@
 # -*- coding: utf-8 -*-
 
 
+import atexit
+import copy
+import fnmatch
+import glob
 import os
 import os.path
+import pickle
+import re
 import sys
+import threading
+import time
+import weakref
+
+from collections import OrderedDict
+
+try:
+    from urllib.parse import urlsplit
+except ImportError:  ## pragma: no cover
+    from urlparse import urlsplit
 
 from kids.cache import cache
 from kids.data import mdict, dct
 
 import kids.file as kf
 
+from .compact import CompactDict, compact, uncompact
+from .index import KeyIndex
+from . import ini
+from .interpolate import Interpolator
+
 
 try:
     basestring
@@ -17,42 +38,326 @@ except NameError:  ## pragma: no cover
     basestring = str
 
 
+##
+## Tree helpers
+##
+
+
+def _iter_leaves(tree, prefix=()):
+    """Yield ``(path, value)`` for all non dict-like values of ``tree``
+
+        >>> sorted(_iter_leaves({'a': {'b': 1, 'c': {}}, 'x': 2}))
+        [(('a', 'b'), 1), (('x',), 2)]
+
+    """
+    for key in tree:
+        value = tree[key]
+        if dct.is_dict_like(value):
+            for leaf in _iter_leaves(value, prefix + (key, )):
+                yield leaf
+        else:
+            yield prefix + (key, ), value
+
+
+class _Missing(object):
+    """Type of ``MISSING``"""
+
+    def __repr__(self):
+        return "MISSING"
+
+    ## stays the same object through pickling
+    def __reduce__(self):
+        return "MISSING"
+
+
+## Stands for a value absent of a tree, as ``None`` is a valid value
+MISSING = _Missing()
+
+
+def diff(old, new, prefix=()):
+    """Yield ``(path, old_value, new_value)`` for each leaf that changed
+
+    Missing values are reported as ``MISSING``, not to be confused with
+    a ``None`` value::
+
+        >>> old = {'db': {'host': 'a', 'port': 1}, 'x': 1, 'z': {'k': 1}}
+        >>> new = {'db': {'host': 'b', 'port': 1}, 'x': 1, 'y': {'k': 2}}
+        >>> for change in sorted(diff(old, new)):
+        ...     print(change)
+        (('db', 'host'), 'a', 'b')
+        (('y', 'k'), MISSING, 2)
+        (('z', 'k'), 1, MISSING)
+
+    Subtrees that are the same object, or equal, are not traversed, so
+    comparing two trees sharing their unchanged parts is cheap.
+
+    """
+    if old is new:
+        return
+    old_is_dict = dct.is_dict_like(old)
+    new_is_dict = dct.is_dict_like(new)
+    if old_is_dict and new_is_dict and old == new:
+        return
+    if not old_is_dict and not new_is_dict:
+        if old is MISSING or new is MISSING or old != new:
+            yield prefix, old, new
+        return
+    if not old_is_dict:
+        if old is not MISSING:
+            yield prefix, old, MISSING
+        old = {}
+    if not new_is_dict:
+        if new is not MISSING:
+            yield prefix, MISSING, new
+        new = {}
+    for key in old:
+        for change in diff(old[key], new[key] if key in new else MISSING,
+                           prefix + (key, )):
+            yield change
+    for key in new:
+        if key not in old:
+            for change in diff(MISSING, new[key], prefix + (key, )):
+                yield change
+
+
+def _deep_sizeof(obj, shared=True, _seen=None):
+    """Return an estimate in bytes of the memory held by ``obj``
+
+    Containers are followed, objects shared between several places are
+    accounted only once::
+
+        >>> shared = "x" * 100
+        >>> _deep_sizeof([shared, shared]) < 2 * sys.getsizeof(shared)
+        True
+
+    Unless ``shared`` is False, then only containers are accounted
+    once, as if all other values where distinct objects::
+
+        >>> _deep_sizeof([shared, shared], shared=False) > 200
+        True
+
+    """
+    if _seen is None:
+        _seen = set()
+    container = dct.is_dict_like(obj) or \
+                isinstance(obj, (dict, list, tuple, set, frozenset))
+    if shared or container:
+        if id(obj) in _seen:
+            return 0
+        _seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, CompactDict):
+        size += sys.getsizeof(obj._values)
+    if dct.is_dict_like(obj) or isinstance(obj, dict):
+        for key in obj:
+            size += _deep_sizeof(key, shared, _seen) + \
+                    _deep_sizeof(obj[key], shared, _seen)
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        for value in obj:
+            size += _deep_sizeof(value, shared, _seen)
+    return size
+
+
 ##
 ## Cfg Managers
 ##
 
+## Parsed trees of config managers are cached per instance in this
+## store, so that one manager can forget its own (see ``Cfg.unload()``),
+## and that it is forgotten along with the manager.
+_CFG_CACHE = weakref.WeakKeyDictionary()
+_cfg_cache = cache(use=_CFG_CACHE, key=lambda self: self)
+
 
 class Cfg(object):
+    """Config manager base class
+
+    Managers can be pickled, and by default the parsed content, if
+    any, is shipped along so that it won't be parsed again::
+
+        >>> import pickle
+        >>> import kids.file as kf
+
+        >>> cfgfile = kf.mk_tmp_file("[db]\\nhost = a")
+        >>> cfg = ConfigObjCfg(cfgfile)
+        >>> cfg._cfg['db']['host']
+        'a'
+        >>> _ = kf.put_contents(cfgfile, "[db]\\nhost = b")
+        >>> pickle.loads(pickle.dumps(cfg))._cfg['db']['host']
+        'a'
+
+    Setting ``pickle_data`` to ``False`` will only ship the reference
+    to the file, that will be parsed when needed::
+
+        >>> cfg.pickle_data = False
+        >>> pickle.loads(pickle.dumps(cfg))._cfg['db']['host']
+        'b'
+
+        >>> kf.rm(cfgfile)
+
+    """
+
+    pickle_data = True
+
+    ## attributes not to be pickled
+    _transient = ()
 
     def __init__(self, filename):
         self._filename = filename
 
-    @cache
+    def __getstate__(self):
+        state = dict(self.__dict__)
+        for attr in self._transient:
+            state.pop(attr, None)
+        if self.pickle_data and self in _CFG_CACHE:
+            state["_pickled_cfg"] = _CFG_CACHE[self]
+        return state
+
+    def __setstate__(self, state):
+        tree = state.pop("_pickled_cfg", MISSING)
+        self.__dict__.update(state)
+        if tree is not MISSING:
+            _CFG_CACHE[self] = tree
+
+    @_cfg_cache
     @property
     def _cfg(self):
         raise NotImplementedError()
 
-    def save(self):
+    def unload(self):
+        """Forget parsed content, next access will parse it again."""
+        _CFG_CACHE.pop(self, None)
+
+    def reload(self):
+        self.unload()
+
+    def save(self, dirty=None):
+        """Write content to the config file
+
+        ``dirty`` can be given to tell that only these top-level keys
+        changed since last save.
+
+        """
         raise NotImplementedError(
             "Save is not implemented for %s config."
             % self.__class__.__name__)
 
 
-def mkCustomCfg(name, load, save):
+def _sorted_keys(tree):
+    try:
+        return sorted(tree)
+    except TypeError:
+        return list(tree)
+
+
+def _holds_list(value):
+    """Return True if ``value`` is or contains a list"""
+    if isinstance(value, list):
+        return True
+    if dct.is_dict_like(value):
+        return any(_holds_list(value[k]) for k in value)
+    return False
+
+
+def mkCustomCfg(name, load, save, dump_section=None):
+    """Return a config manager class using given functions
+
+    If ``dump_section(key, value)`` is provided, it must return the
+    serialized text of one top-level key, and the file content must be
+    the concatenation of these in sorted key order. Text of unchanged
+    sections is then reused between saves::
+
+        >>> import kids.file as kf
+
+        >>> dumped = []
+        >>> def dump_section(key, value):
+        ...     dumped.append(key)
+        ...     return "%s = %r\\n" % (key, value)
+        >>> MyCfg = mkCustomCfg("MyCfg", lambda f: PyCfg(f)._cfg, None,
+        ...                     dump_section)
+
+        >>> cfgfile = kf.mk_tmp_file("a = 1\\nb = {'x': 2}\\n")
+        >>> cfg = Config(MyCfg(cfgfile))
+        >>> cfg.a = 2
+        >>> dumped
+        ['a', 'b']
+
+    ``Config`` tells which top-level keys were changed, so only these
+    are serialized again::
+
+        >>> cfg.b.x = 3
+        >>> dumped
+        ['a', 'b', 'b']
+        >>> print(kf.get_contents(cfgfile).strip())
+        a = 2
+        b = {'x': 3}
+
+        >>> kf.rm(cfgfile)
+
+    As lists are given as is by ``Config``, they can be changed in
+    place, so sections holding lists are always serialized again::
+
+        >>> cfgfile = kf.mk_tmp_file("hosts = ['a']\\nx = 1\\n")
+        >>> cfg = Config(MyCfg(cfgfile))
+        >>> cfg.x = 2
+        >>> cfg.hosts.append('b')
+        >>> cfg.x = 3
+        >>> print(kf.get_contents(cfgfile).strip())
+        hosts = ['a', 'b']
+        x = 3
+
+        >>> kf.rm(cfgfile)
+
+    """
 
     class CustomCfg(Cfg):
 
-        @cache
+        _sections = None  ## top-level key -> serialized text
+        _transient = ("_sections", )
+
+        @_cfg_cache
         @property
         def _cfg(self):
+            self._sections = None
             return load(self._filename) \
                    if os.path.exists(self._filename) else \
                    {}
 
-        def save(self):
-            save(self._filename, self._cfg)
+        def save(self, dirty=None):
+            tree = self._cfg
+            if dump_section is None or not tree:
+                save(self._filename, tree)
+                return
+            sections = {}
+            if dirty is not None and self._sections is not None:
+                ## kept untouched until the file is written
+                sections = dict(self._sections)
+                for key in dirty:
+                    sections.pop(key, None)
+            texts = []
+            for key in _sorted_keys(tree):
+                text = sections.get(key)
+                if text is None:
+                    text = dump_section(key, tree[key])
+                    ## lists can be changed in place, unknown to ``dirty``
+                    if not _holds_list(tree[key]):
+                        sections[key] = text
+                texts.append(text)
+            for key in [k for k in sections if k not in tree]:
+                del sections[key]
+            with open(self._filename, 'w') as f:
+                f.write("".join(texts))
+            self._sections = sections
 
     CustomCfg.__name__ = name
+    CustomCfg.__qualname__ = name
+    ## as ``namedtuple`` does, so that pickle finds the class where
+    ## it is stored by the caller.
+    try:
+        CustomCfg.__module__ = sys._getframe(1).f_globals.get(
+            "__name__", "__main__")
+    except (AttributeError, ValueError):  ## pragma: no cover
+        pass
 
     return CustomCfg
 
@@ -78,11 +383,15 @@ class PyCfg(Cfg):
 
     """
 
+    ## values can be functions or modules, so only the file reference
+    ## is pickled by default.
+    pickle_data = False
+
     def __init__(self, filename, config=None):
         super(PyCfg, self).__init__(filename)
         self.config = config
 
-    @cache
+    @_cfg_cache
     @property
     def _cfg(self):
         if not os.path.exists(self._filename):
@@ -106,6 +415,11 @@ class PyCfg(Cfg):
                     if k != "__builtins__")
 
 
+## IniCfg
+
+IniCfg = mkCustomCfg("IniCfg", ini.load, ini.save)
+
+
 ## ConfigObjCfg
 
 try:
@@ -119,17 +433,20 @@ if configobj:
     def loadConfigObj(filename):
         return configobj.ConfigObj(filename)
 
-    def saveConfigObj(_filename, content):
+    def saveConfigObj(filename, content):
+        if not isinstance(content, configobj.ConfigObj):
+            content = configobj.ConfigObj(content)
+            content.filename = filename
         content.write()
 
     ConfigObjCfg = mkCustomCfg("ConfigObjCfg", loadConfigObj, saveConfigObj)
 
 else:
 
-    def ConfigObjCfg(_f):
-        raise ValueError(
-            "You can't use ConfigObjLoader since 'configobj' "
-            "is not available on your system.")
+    ## Same files can be read without ``configobj``, with differences:
+    ## saving drops comments and blank lines, and ``%(name)s`` values
+    ## are not interpolated (``configobj`` does it by default).
+    ConfigObjCfg = IniCfg
 
 
 ## YamlCfg
@@ -146,13 +463,58 @@ if yaml:
         if kf.chk.is_empty(filename):
             return {}
         with open(filename, 'r') as f:
-            return yaml.safe_load(f)
+            return yaml.safe_load(f) or {}
+
+    class _YamlDumper(yaml.Dumper):
+        """Dumper writing shared values again instead of using aliases"""
+
+        def ignore_aliases(self, data):
+            return True
 
     def saveYaml(filename, content):
         with open(filename, 'w') as f:
-            f.write(yaml.dump(content, default_flow_style=False))
-
-    YamlCfg = mkCustomCfg("YamlCfg", loadYaml, saveYaml)
+            f.write(yaml.dump(content, Dumper=_YamlDumper,
+                              default_flow_style=False))
+
+    def dumpYamlSection(key, value):
+        """Return YAML text of top-level ``key``
+
+        Sections are dumped separately, so anchors and aliases can't be
+        used, as they would not be numbered across sections. Values
+        shared in the tree are written again where they appear::
+
+            >>> import kids.file as kf
+            >>> cfgfile = kf.mk_tmp_file('''
+            ... a: {x: &port [1, 2], y: *port}
+            ... b: {x: *port, y: *port}''')
+            >>> cfg = Config(YamlCfg(cfgfile))
+            >>> cfg.c = 1
+            >>> print(kf.get_contents(cfgfile).strip())
+            a:
+              x:
+              - 1
+              - 2
+              y:
+              - 1
+              - 2
+            b:
+              x:
+              - 1
+              - 2
+              y:
+              - 1
+              - 2
+            c: 1
+            >>> Config(YamlCfg(cfgfile)).b.y
+            [1, 2]
+
+            >>> kf.rm(cfgfile)
+
+        """
+        return yaml.dump({key: value}, Dumper=_YamlDumper,
+                         default_flow_style=False)
+
+    YamlCfg = mkCustomCfg("YamlCfg", loadYaml, saveYaml, dumpYamlSection)
 
 else:
 
@@ -161,27 +523,813 @@ else:
             "You can't use YamlLoader since 'yaml' "
             "is not available on your system.")
 
+## DirCfg
+
+def _merge(base, value):
+    """Return ``value`` recursively merged over ``base``
+
+    Given values are not modified, new dicts are created where needed::
+
+        >>> from pprint import pprint as pp
+        >>> base = {'a': {'b': 1, 'c': 2}, 'x': 1}
+        >>> pp(_merge(base, {'a': {'c': 3}, 'y': 2}))
+        {'a': {'b': 1, 'c': 3}, 'x': 1, 'y': 2}
+        >>> pp(base)
+        {'a': {'b': 1, 'c': 2}, 'x': 1}
+
+    """
+    if base is MISSING or not dct.is_dict_like(base) or \
+           not dct.is_dict_like(value):
+        return value
+    merged = dict((k, base[k]) for k in base)
+    for k in value:
+        merged[k] = _merge(merged.get(k, MISSING), value[k])
+    return merged
+
+
+class DirCfg(Cfg):
+    """Directory of config fragments parser
+
+    Typically used for ``conf.d`` directories, fragments matching
+    ``pattern`` are parsed with the config manager that suits them,
+    and merged in lexical order of their names, so the latest fragment
+    wins::
+
+        >>> import kids.file as kf
+        >>> from pprint import pprint as pp
+
+        >>> tmpdir = kf.mk_tmp_dir()
+        >>> _ = kf.put_contents(os.path.join(tmpdir, '10-base.rc'),
+        ...                     'db:\\n  host: a\\n  port: 1\\nx: 1\\n')
+        >>> _ = kf.put_contents(os.path.join(tmpdir, '20-site.rc'),
+        ...                     "db = {'host': 'b'}")
+        >>> _ = kf.put_contents(os.path.join(tmpdir, 'README'), 'ignored')
+
+        >>> cfg = DirCfg(tmpdir)
+        >>> pp(cfg._cfg)
+        {'db': {'host': 'b', 'port': 1}, 'x': 1}
+
+    Each fragment is parsed again on ``reload()`` only if its
+    modification time or size changed. As parsing is CPU bound, when at
+    least ``parallel_threshold`` fragments are to be parsed, they are
+    parsed by a pool of ``workers`` processes (see ``load_many()``).
+    The merged content is then patched in place for the top-level keys
+    that the changed fragments are defining::
+
+        >>> merged = cfg._cfg
+        >>> _ = kf.put_contents(os.path.join(tmpdir, '30-new.rc'),
+        ...                     '[z]\\nx = 2\\n')
+        >>> cfg.reload()
+        >>> cfg._cfg is merged
+        True
+        >>> pp(merged)
+        {'db': {'host': 'b', 'port': 1}, 'x': 1, 'z': {'x': '2'}}
+
+        >>> kf.rm(os.path.join(tmpdir, '20-site.rc'))
+        >>> cfg.reload()
+        >>> pp(merged)
+        {'db': {'host': 'a', 'port': 1}, 'x': 1, 'z': {'x': '2'}}
+
+    ``choose_cfg_manager`` will select this manager for directories, so
+    ``Config`` and ``MConfig`` accept them directly::
+
+        >>> Config(tmpdir).db.host
+        'a'
+
+        >>> kf.rm(tmpdir, recursive=True, force=True)
+
+    """
+
+    ## fragments are parsed again on next ``reload()``
+    _transient = ("_fragments", "_order")
+
+    ## below this, starting processes costs more than it saves
+    parallel_threshold = 16
+
+    def __init__(self, filename, pattern="*.rc", workers=4):
+        super(DirCfg, self).__init__(filename)
+        self.pattern = pattern
+        self.workers = workers
+        self._fragments = {}  ## path -> (stamp, tree)
+        self._order = []
+
+    @staticmethod
+    def _parse(path):
+        return choose_cfg_manager(path)._cfg
+
+    def _refresh(self):
+        """Parse new and changed fragments, returns top-level keys changed"""
+        stamps = {}
+        for path in glob.glob(os.path.join(self._filename, self.pattern)):
+            try:
+                st = os.stat(path)
+            except OSError:
+                ## removed since listed, as it is being rewritten
+                continue
+            stamps[path] = (st.st_mtime, st.st_size)
+        paths = sorted(stamps)
+        changed = [path for path in paths
+                   if self._fragments.get(path, (None, ))[0] != stamps[path]]
+        if len(changed) >= self.parallel_threshold and self.workers > 1:
+            trees = []
+            for _path, tree in load_many(
+                    changed, workers=min(self.workers, len(changed))):
+                if isinstance(tree, Exception):
+                    raise tree
+                trees.append(tree)
+        else:
+            trees = [self._parse(path) for path in changed]
+
+        keys = set()
+        for path in [p for p in self._fragments if p not in stamps]:
+            keys.update(self._fragments.pop(path)[1])
+        for path, tree in zip(changed, trees):
+            if path in self._fragments:
+                keys.update(self._fragments[path][1])
+            keys.update(tree)
+            self._fragments[path] = (stamps[path], tree)
+        self._order = paths
+        return keys
+
+    def _patch(self, merged, keys):
+        for key in keys:
+            value = MISSING
+            for path in self._order:
+                tree = self._fragments[path][1]
+                if key in tree:
+                    value = _merge(value, tree[key])
+            if value is MISSING:
+                merged.pop(key, None)
+            else:
+                merged[key] = value
+
+    @_cfg_cache
+    @property
+    def _cfg(self):
+        merged = {}
+        self._patch(merged, self._refresh())
+        return merged
+
+    def unload(self):
+        super(DirCfg, self).unload()
+        self._fragments = {}
+        self._order = []
+
+    def reload(self):
+        if self not in _CFG_CACHE:
+            return
+        self._patch(self._cfg, self._refresh())
+
+
+## CompactCfg
+
+class CompactCfg(Cfg):
+    """Memory-compact wrapper of other config manager
+
+    The tree parsed by the given config manager is converted to a
+    compact representation (see ``kids.cfg.compact``), and the
+    original tree is then forgotten::
+
+        >>> import kids.file as kf
+
+        >>> cfgfile = kf.mk_tmp_file('''
+        ... a: {host: h1, port: 1}
+        ... b: {host: h1, port: 2}''')
+        >>> cfg = CompactCfg(YamlCfg(cfgfile))
+        >>> cfg._cfg['b']['host']
+        'h1'
+        >>> cfg._cfg['a']._layout is cfg._cfg['b']._layout
+        True
+
+    Saving will go through the wrapped config manager::
+
+        >>> cfg._cfg['a']['port'] = 3
+        >>> cfg.save()
+        >>> print(kf.get_contents(cfgfile).strip())
+        a:
+          host: h1
+          port: 3
+        b:
+          host: h1
+          port: 2
+
+        >>> kf.rm(cfgfile)
+
+    As the original tree was forgotten, the file is parsed again by the
+    wrapped config manager on save, and only the changes are written in
+    this new tree. So comments of a ``ConfigObjCfg`` file are kept (when
+    ``configobj`` is installed), but for the ones of removed values::
+
+        >>> cfgfile = kf.mk_tmp_file('''
+        ... [a]
+        ... # default port
+        ... port = 1
+        ... host = h1
+        ... ''')
+        >>> cfg = CompactCfg(ConfigObjCfg(cfgfile))
+        >>> cfg._cfg['a']['host'] = 'h2'
+        >>> cfg.save()
+        >>> content = kf.get_contents(cfgfile)
+        >>> "host = h2" in content
+        True
+        >>> configobj is None or "# default port" in content
+        True
+
+        >>> kf.rm(cfgfile)
+
+    """
+
+    def __init__(self, cfg_manager):
+        super(CompactCfg, self).__init__(cfg_manager._filename)
+        self._cfg_manager = cfg_manager
+
+    @_cfg_cache
+    @property
+    def _cfg(self):
+        tree = compact(self._cfg_manager._cfg)
+        self._cfg_manager.unload()
+        return tree
+
+    def unload(self):
+        super(CompactCfg, self).unload()
+        self._cfg_manager.unload()
+
+    @classmethod
+    def _apply(cls, target, tree):
+        """Change ``target`` in place to get same content than ``tree``"""
+        for key in [k for k in target if k not in tree]:
+            del target[key]
+        for key in tree:
+            value = tree[key]
+            if key in target and dct.is_dict_like(value) and \
+                   dct.is_dict_like(target[key]):
+                cls._apply(target[key], value)
+            elif key not in target or target[key] != value:
+                target[key] = uncompact(value)
+
+    def save(self, dirty=None):
+        try:
+            self._apply(self._cfg_manager._cfg, self._cfg)
+            self._cfg_manager.save(dirty)
+        finally:
+            self._cfg_manager.unload()
+
+
+## OverlayCfg
+
+class OverlayCfg(Cfg):
+    """In-memory config layer
+
+    Nothing is read nor written on disk, values are kept in a plain
+    dict tree. ``save()`` only records which top-level keys changed
+    since last ``flush_dirty()``::
+
+        >>> overlay = OverlayCfg()
+        >>> cfg = Config(overlay)
+        >>> cfg.debug = True
+        >>> cfg.debug
+        True
+        >>> overlay.flush_dirty()
+        ['debug']
+        >>> overlay.flush_dirty()
+        []
+
+    """
+
+    def __init__(self, tree=None):
+        super(OverlayCfg, self).__init__(None)
+        self._tree = {} if tree is None else tree
+        self._dirty = set()
+
+    @property
+    def _cfg(self):
+        return self._tree
+
+    def unload(self):
+        """Values only live in memory, there's nothing to forget."""
+
+    def save(self, dirty=None):
+        self._dirty.update(self._tree if dirty is None else dirty)
+
+    def flush_dirty(self):
+        """Return and forget top-level keys changed since last call"""
+        dirty, self._dirty = self._dirty, set()
+        return _sorted_keys(dirty)
+
+
+## EnvCfg
+
+_INT = re.compile(r'^[-+]?\d+$')
+_FLOAT = re.compile(r'^[-+]?(\d+\.\d*|\.\d+|\d+(\.\d*)?[eE][-+]?\d+)$')
+
+
+def _coerce(value):
+    """Return ``value`` converted to bool, int or float if it looks so
+
+        >>> [_coerce(v) for v in ("True", "no", "20", "-1.5", "1e3", "x")]
+        [True, 'no', 20, -1.5, 1000.0, 'x']
+
+    """
+    lowered = value.lower()
+    if lowered in ("true", "false"):
+        return lowered == "true"
+    if _INT.match(value):
+        return int(value)
+    if _FLOAT.match(value):
+        return float(value)
+    return value
+
+
+class EnvCfg(Cfg):
+    """Environment variables config layer
+
+    Variables whose name begins with ``prefix`` are read once, in a
+    tree where ``sep`` separates sections. Keys are lowercased and
+    values coerced to bool, int or float if ``coerce`` is set::
+
+        >>> from pprint import pprint as pp
+
+        >>> environ = {'MYAPP__DB__POOL_SIZE': '20',
+        ...            'MYAPP__DB__HOST': 'localhost',
+        ...            'MYAPP__DEBUG': 'true',
+        ...            'OTHER': 'x'}
+        >>> cfg = EnvCfg('MYAPP__', environ=environ)
+        >>> pp(cfg._cfg)
+        {'db': {'host': 'localhost', 'pool_size': 20}, 'debug': True}
+
+    The environment is not read again until ``reload()``::
+
+        >>> environ['MYAPP__DEBUG'] = 'false'
+        >>> cfg._cfg['debug']
+        True
+        >>> cfg.reload()
+        >>> cfg._cfg['debug']
+        False
+
+    """
+
+    def __init__(self, prefix, sep="__", coerce=True, environ=None):
+        super(EnvCfg, self).__init__("$%s*" % prefix)
+        self.prefix = prefix
+        self.sep = sep
+        self.coerce = coerce
+        self.environ = environ
+
+    @_cfg_cache
+    @property
+    def _cfg(self):
+        environ = os.environ if self.environ is None else self.environ
+        tree = {}
+        ## sorted, so that ``A__B`` makes ``A`` a section even if ``A``
+        ## is also set.
+        for name in sorted(environ):
+            if not name.startswith(self.prefix):
+                continue
+            path = [key.lower()
+                    for key in name[len(self.prefix):].split(self.sep)]
+            if not all(path):
+                continue
+            node = tree
+            for key in path[:-1]:
+                if not isinstance(node.get(key), dict):
+                    node[key] = {}
+                node = node[key]
+            if isinstance(node.get(path[-1]), dict):
+                continue
+            value = environ[name]
+            node[path[-1]] = _coerce(value) if self.coerce else value
+        return tree
+
+
+## HttpCfg
+
+## modules only needed by ``HttpCfg`` are imported when first used, as
+## they would weight a lot on the import time of ``kids.cfg``.
+
+def _httplib():
+    try:
+        import http.client as httplib
+    except ImportError:  ## pragma: no cover
+        import httplib
+    return httplib
+
+
+def _user_cache_dir():
+    """Return private directory of cached remote configs, creating it"""
+    path = os.path.join(
+        os.environ.get("XDG_CACHE_HOME") or
+        os.path.join(os.path.expanduser("~"), ".cache"),
+        "kids.cfg")
+    try:
+        os.makedirs(path, 0o700)
+    except OSError:
+        if not os.path.isdir(path):
+            raise
+    return path
+
+
+class HttpCfg(Cfg):
+    """HTTP served config file
+
+    Let's serve a config file locally::
+
+        >>> import threading
+        >>> try:
+        ...     from http.server import HTTPServer, BaseHTTPRequestHandler
+        ...     from socketserver import ThreadingMixIn
+        ... except ImportError:
+        ...     from BaseHTTPServer import HTTPServer, BaseHTTPRequestHandler
+        ...     from SocketServer import ThreadingMixIn
+
+        >>> served = {'body': b'db:\\n    host: a\\n', 'etag': '"1"'}
+        >>> log = []
+        >>> class Handler(BaseHTTPRequestHandler):
+        ...     protocol_version = "HTTP/1.1"
+        ...     def do_GET(self):
+        ...         if self.headers.get('If-None-Match') == served['etag']:
+        ...             log.append(304)
+        ...             self.send_response(304)
+        ...             self.send_header('Content-Length', '0')
+        ...             self.end_headers()
+        ...             return
+        ...         log.append(200)
+        ...         self.send_response(200)
+        ...         self.send_header('ETag', served['etag'])
+        ...         self.send_header('Content-Length', str(len(served['body'])))
+        ...         self.end_headers()
+        ...         self.wfile.write(served['body'])
+        ...     def log_message(self, *args):
+        ...         pass
+
+        >>> class Server(ThreadingMixIn, HTTPServer):
+        ...     daemon_threads = True
+        >>> server = Server(('127.0.0.1', 0), Handler)
+        >>> thread = threading.Thread(target=server.serve_forever)
+        >>> thread.daemon = True
+        >>> thread.start()
+        >>> url = 'http://127.0.0.1:%d/app.rc' % server.server_address[1]
+
+    ``choose_cfg_manager`` will select ``HttpCfg`` for URLs, so it can
+    be used as any other config::
+
+        >>> import kids.file as kf
+        >>> tmpdir = kf.mk_tmp_dir()
+        >>> cache_file = os.path.join(tmpdir, 'app.rc')
+
+        >>> cfg = Config(HttpCfg(url, cache_file=cache_file))
+        >>> cfg.db.host
+        'a'
+
+    Reloading sends the ``ETag`` received, and unchanged content costs
+    a ``304`` answer and no parsing::
+
+        >>> cfg.reload()
+        >>> log
+        [200, 304]
+
+        >>> served.update(body=b'db:\\n    host: b\\n', etag='"2"')
+        >>> cfg.reload()
+        >>> cfg.db.host
+        'b'
+        >>> log
+        [200, 304, 200]
+
+    Content is served without waiting for the network for ``max_age``
+    seconds, then it is revalidated in background while the current
+    content is still served::
+
+        >>> served.update(body=b'db:\\n    host: c\\n', etag='"3"')
+        >>> manager = HttpCfg(url, cache_file=cache_file, max_age=0)
+        >>> cfg = Config(manager)
+        >>> cfg.db.host
+        'c'
+        >>> cfg.find_paths()
+        ['db.host']
+        >>> manager._refresher.join()
+        >>> served.update(body=b'db:\\n    host: d\\n    port: 1\\n',
+        ...               etag='"4"')
+        >>> cfg.db.host
+        'c'
+        >>> manager._refresher.join()
+        >>> cfg.db.host
+        'd'
+
+    Changes are then reported as for a ``reload()``::
+
+        >>> cfg.find_paths()
+        ['db.host', 'db.port']
+
+    Remote content is never executed: it is parsed by the ``parser``
+    config manager class given, or by the first of the config managers
+    that don't execute code able to read it. So this Python content is
+    read as INI::
+
+        >>> served.update(body=b'x = 1\\n', etag='"5"')
+        >>> Config(HttpCfg(url, cache_file=cache_file)).x
+        '1'
+
+        >>> HttpCfg(url, parser=PyCfg)
+        Traceback (most recent call last):
+        ...
+        ValueError: Remote content can't be parsed by PyCfg.
+
+    A copy is kept on disk, to be used when the server is not
+    available. By default, it is stored in a ``kids.cfg`` directory
+    of the user cache directory, only readable by the user::
+
+        >>> server.shutdown()
+        >>> server.server_close()
+        >>> Config(HttpCfg(url, cache_file=cache_file)).x
+        '1'
+
+        >>> kf.rm(tmpdir, recursive=True, force=True)
+
+    """
+
+    def __init__(self, filename, cache_file=None, max_age=None, timeout=10,
+                 parser=None):
+        super(HttpCfg, self).__init__(filename)
+        if parser is not None and issubclass(parser, PyCfg):
+            raise ValueError("Remote content can't be parsed by %s."
+                             % parser.__name__)
+        if cache_file is None:
+            import hashlib
+            cache_file = os.path.join(
+                _user_cache_dir(), "%s.rc"
+                % hashlib.sha1(filename.encode("utf-8")).hexdigest())
+        self.cache_file = cache_file
+        self.parser = parser
+        self.max_age = max_age
+        self.timeout = timeout
+        self._url = urlsplit(filename)
+        self._conn = None
+        self._lock = threading.Lock()
+        self._refresher = None
+        ## called with old and new trees after a background refresh
+        self._listeners = []
+        self._tree = None
+        self._checked = 0
+
+    _transient = ("_conn", "_lock", "_refresher", "_listeners")
+
+    def __getstate__(self):
+        state = super(HttpCfg, self).__getstate__()
+        if not self.pickle_data:
+            state["_tree"] = None
+            state["_checked"] = 0
+        return state
+
+    def __setstate__(self, state):
+        super(HttpCfg, self).__setstate__(state)
+        self._conn = None
+        self._lock = threading.Lock()
+        self._refresher = None
+        self._listeners = []
+
+    def _connection(self):
+        if self._conn is None:
+            httplib = _httplib()
+            conn_class = httplib.HTTPSConnection \
+                         if self._url.scheme == "https" else \
+                         httplib.HTTPConnection
+            self._conn = conn_class(self._url.netloc, timeout=self.timeout)
+        return self._conn
+
+    def _request(self, headers):
+        import socket
+        httplib = _httplib()
+        path = self._url.path or "/"
+        if self._url.query:
+            path += "?" + self._url.query
+        ## a kept-alive connection could have been closed by the server,
+        ## so we retry once on a new connection.
+        for attempt in (1, 2):
+            conn = self._connection()
+            try:
+                conn.request("GET", path, headers=headers)
+                response = conn.getresponse()
+                return response, response.read()
+            except (socket.error, httplib.HTTPException):
+                conn.close()
+                self._conn = None
+                if attempt == 2:
+                    raise
+
+    def _meta(self):
+        import json
+        try:
+            with open(self.cache_file + ".meta") as f:
+                return json.load(f)
+        except (IOError, OSError, ValueError):
+            return {}
+
+    def _fetch(self):
+        """Fetch remote content in cache file, return True if changed"""
+        headers = {}
+        if os.path.exists(self.cache_file):
+            meta = self._meta()
+            if meta.get("etag"):
+                headers["If-None-Match"] = meta["etag"]
+            if meta.get("last_modified"):
+                headers["If-Modified-Since"] = meta["last_modified"]
+        response, body = self._request(headers)
+        if response.status == 304:
+            return False
+        if response.status != 200:
+            raise IOError("Unexpected HTTP status %d when fetching %r."
+                          % (response.status, self._filename))
+        tmp = self.cache_file + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(body)
+        os.rename(tmp, self.cache_file)
+        ## written last: if interrupted before, the old validators
+        ## would only cost a full answer next time.
+        import json
+        with open(tmp, "w") as f:
+            json.dump({"etag": response.getheader("ETag"),
+                       "last_modified": response.getheader("Last-Modified")},
+                      f)
+        os.rename(tmp, self.cache_file + ".meta")
+        return True
+
+    def revalidate(self):
+        """Check for remote changes, and parse content if changed"""
+        import socket
+        httplib = _httplib()
+        with self._lock:
+            try:
+                changed = self._fetch()
+            except (IOError, OSError, socket.error, httplib.HTTPException):
+                if self._tree is not None or \
+                       not os.path.exists(self.cache_file):
+                    raise
+                changed = True
+            self._checked = time.time()
+            if changed or self._tree is None:
+                self._tree = self._parse()
+
+    def _parse(self):
+        if self.parser is not None:
+            return self.parser(self.cache_file)._cfg
+        return choose_cfg_manager(self.cache_file, managers=_DATA_CFG)._cfg
+
+    def _revalidate_in_background(self):
+        old = self._tree
+        try:
+            self.revalidate()
+        except Exception:
+            ## current content will be served until next revalidation
+            return
+        if self._tree is not old:
+            for listener in list(self._listeners):
+                listener(old, self._tree)
+
+    @property
+    def _cfg(self):
+        if self._tree is None:
+            self.revalidate()
+        elif self.max_age is not None and \
+                 time.time() - self._checked >= self.max_age and \
+                 (self._refresher is None or not self._refresher.is_alive()):
+            self._refresher = threading.Thread(
+                target=self._revalidate_in_background)
+            self._refresher.daemon = True
+            self._refresher.start()
+        return self._tree
+
+    def unload(self):
+        self._tree = None
+
+    def reload(self):
+        self.revalidate()
+
+
 ## most picky config parser first.
 ## (note: Yaml parser is not picky at all)
-_GENERIC_CFG = [PyCfg, ConfigObjCfg, YamlCfg]
+_DATA_CFG = [ConfigObjCfg, YamlCfg]  ## the ones not executing code
+_GENERIC_CFG = [PyCfg] + _DATA_CFG
 _NEW_FILE_FORMAT = YamlCfg
 
 
-def choose_cfg_manager(filename):
+def choose_cfg_manager(filename, report=None, managers=None):
+    """Return a config manager instance able to read ``filename``.
+
+    If ``report`` is a list, a ``(manager_name, elapsed, error)``
+    3-uple is appended to it for each config manager tried, ``error``
+    being ``None`` for the one that was chosen. ``managers`` are the
+    config manager classes to try, defaulting to all generic ones.
+
+    """
+    if filename.startswith(("http://", "https://")):
+        return HttpCfg(filename)
+    if os.path.isdir(filename):
+        return DirCfg(filename)
     if not os.path.exists(filename) or kf.chk.is_empty(filename):
         return _NEW_FILE_FORMAT(filename)
-    for cm in _GENERIC_CFG:
+    for cm in _GENERIC_CFG if managers is None else managers:
+        start = time.time()
         try:
-            cm(filename)._cfg
-            return cm(filename)
-        except Exception:
-            pass
+            manager = cm(filename)
+            manager._cfg
+        except Exception as e:
+            if report is not None:
+                report.append((cm.__name__, time.time() - start, e))
+            continue
+        if report is not None:
+            report.append((cm.__name__, time.time() - start, None))
+        ## already parsed, we won't need to parse it again.
+        return manager
     raise SyntaxError(
         "No config parser manage to read config file %r."
         % (filename, ))
 
 
-class Config(dct.AttrDictAbstract):
+class _SubscribersMixin(object):
+    """Path-scoped subscriptions to changes happening on reload"""
+
+    def subscribe(self, pattern, callback):
+        """Call ``callback`` with changes of paths matching ``pattern``
+
+        ``pattern`` is a glob on dotted paths (as ``db.*``), and will
+        also match any path under it. The callback receives a list of
+        ``(path, old_value, new_value)``, where an added or removed
+        value is ``MISSING`` on the other side.
+
+        """
+        self._root._subscribers.append((pattern, callback))
+
+    def unsubscribe(self, pattern, callback):
+        self._root._subscribers.remove((pattern, callback))
+
+    def _notify(self, changes):
+        subscribers = self._root._subscribers
+        if not subscribers:
+            return
+        changes = [(".".join(str(k) for k in path), old, new)
+                   for path, old, new in changes]
+        for pattern, callback in list(subscribers):
+            matching = [change for change in changes
+                        if fnmatch.fnmatchcase(change[0], pattern) or
+                        change[0].startswith(pattern + ".")]
+            if matching:
+                callback(matching)
+
+
+def _snapshot(tree):
+    """Return a shallow copy of ``tree`` to be compared after reload"""
+    return dict((k, tree[k]) for k in tree)
+
+
+def _update_indexes(indexes, changes):
+    """Report in ``indexes`` the values added or removed in ``changes``"""
+    for path, old, new in changes:
+        if old is MISSING:
+            for index in indexes:
+                index.add(path)
+        elif new is MISSING:
+            for index in indexes:
+                index.remove(path)
+
+
+class _KeyIndexMixin(object):
+    """Glob queries on dotted paths of values, through a ``KeyIndex``
+
+    The index is built on first query, and then kept up to date on
+    writes and reloads.
+
+    """
+
+    def _key_index(self):
+        root = self._root
+        if root._index is None:
+            root._index = root._build_index()
+        return root._index
+
+    def _pattern(self, pattern):
+        prefix = ".".join(str(k) for k in self._prefix)
+        if not prefix:
+            return pattern
+        return prefix if pattern is None else prefix + "." + pattern
+
+    def find_paths(self, pattern=None):
+        """Return sorted dotted paths of values matching glob ``pattern``
+
+        Paths under the ones matching ``pattern`` are also returned,
+        and they are relative to the current section.
+
+        """
+        paths = self._key_index().find(self._pattern(pattern))
+        if not self._prefix:
+            return paths
+        size = len(self._pattern(None)) + 1
+        return [path[size:] for path in paths]
+
+    def count_paths(self, pattern=None):
+        """Return number of paths ``find_paths(pattern)`` would return"""
+        return self._key_index().count(self._pattern(pattern))
+
+
+class Config(_KeyIndexMixin, _SubscribersMixin, dct.AttrDictAbstract):
     """Config file access
 
     This wraps the given config file and provide way to browse
@@ -306,6 +1454,14 @@ class Config(dct.AttrDictAbstract):
         >>> cfg.b.bar
         '2'
 
+    The built-in ``IniCfg`` reads the same files faster, in plain
+    dicts, and is used as ``ConfigObjCfg`` if ``configobj`` is not
+    installed::
+
+        >>> cfg = Config(IniCfg(cfgfile))
+        >>> cfg.a.x.foo
+        '1'
+
         >>> kf.rm(cfgfile)
 
 
@@ -402,6 +1558,18 @@ class Config(dct.AttrDictAbstract):
         [b]
         bar = 2
 
+    So is it in ``IniCfg``::
+
+        >>> cfg = Config(IniCfg(cfgfile))
+        >>> cfg.b.bar = 4
+        >>> print(kf.get_contents(cfgfile).strip())
+        [a]
+        c = 2
+        [[x]]
+        foo = 3
+        [b]
+        bar = 4
+
         >>> kf.rm(cfgfile)
 
 
@@ -515,16 +1683,186 @@ class Config(dct.AttrDictAbstract):
         a: 2
         >>> kf.rm(cfgfile)
 
-    """
 
-    def __init__(self, config=None, prefix=None, cfg=None, label=None):
-        self._prefix = prefix if prefix else []
-        self._cfg_manager = config if isinstance(config, Cfg) \
-                            else choose_cfg_manager(config)
-        self._provided_cfg = cfg
-        self.__label__ = label
+    Compact storage
+    ===============
+
+    Large configs with a lot of sections sharing the same keys can be
+    stored in a more compact form, read and write access remains
+    unchanged::
+
+        >>> cfgfile = kf.mk_tmp_file("\\n".join(
+        ...     "t%d: {host: h, port: %d, enabled: true}" % (i, i)
+        ...     for i in range(100)))
+        >>> cfg = Config(cfgfile, compact=True)
+        >>> cfg.t42.port
+        42
+        >>> cfg.t42.port = 43
+        >>> Config(cfgfile).t42.port
+        43
+
+    Note that each save parses the file again, to write only the
+    changes in it (see ``CompactCfg``).
+
+    ``memory_usage()`` reports the savings::
+
+        >>> usage = cfg.memory_usage()
+        >>> usage['size'] < usage['plain_size'] / 2
+        True
+
+        >>> kf.rm(cfgfile)
+
+
+    Interpolation
+    =============
+
+    ``${section.key}`` references in values can be resolved::
+
+        >>> cfgfile = kf.mk_tmp_file('''
+        ... db: {host: example.com, port: 5432}
+        ... url: pg://${db.host}:${db.port}/''')
+        >>> cfg = Config(cfgfile, interpolate=True)
+        >>> cfg.url
+        'pg://example.com:5432/'
+
+    Writing a referenced value is reflected on dependent values::
+
+        >>> cfg.db.host = 'localhost'
+        >>> cfg.url
+        'pg://localhost:5432/'
+
+        >>> kf.rm(cfgfile)
+
+
+    Change subscriptions
+    ====================
+
+    You can subscribe to changes that ``reload()`` will find::
+
+        >>> cfgfile = kf.mk_tmp_file('''
+        ... db: {host: a, port: 1}
+        ... cache: {size: 10}''')
+        >>> cfg = Config(cfgfile)
+        >>> cfg.db.host
+        'a'
+
+        >>> def show(changes):
+        ...     print(changes)
+        >>> cfg.subscribe("db.*", show)
+        >>> cfg.subscribe("cache", show)
+
+    Only subscribers whose pattern matches changed paths are called::
+
+        >>> _ = kf.put_contents(cfgfile, '''
+        ... db: {host: b, port: 1}
+        ... cache: {size: 10}''')
+        >>> cfg.reload()
+        [('db.host', 'a', 'b')]
+
+        >>> cfg.unsubscribe("db.*", show)
+        >>> _ = kf.put_contents(cfgfile, "db: {host: c}")
+        >>> cfg.reload()
+        [('cache.size', 10, MISSING)]
+
+        >>> kf.rm(cfgfile)
+
+
+    Pickling
+    ========
+
+    A ``Config`` can be pickled, to be sent to other processes. Its
+    config manager is pickled along with the parsed values (see
+    ``Cfg``), while subscribers are not::
+
+        >>> import pickle
+
+        >>> cfgfile = kf.mk_tmp_file("db:\\n    host: a\\n    port: 1")
+        >>> cfg = Config(cfgfile)
+        >>> cfg.db.host
+        'a'
+        >>> db = pickle.loads(pickle.dumps(cfg.db))
+        >>> db
+        <Config '...' (2 values, prefix=['db'])>
+        >>> db.host
+        'a'
+
+    A sub-``Config`` gets its top-level ``Config`` along, so references
+    to values out of its section can still be resolved::
+
+        >>> cfgfile = kf.mk_tmp_file("host: a\\ndb:\\n    url: ${host}:1")
+        >>> db = pickle.loads(pickle.dumps(
+        ...     Config(cfgfile, interpolate=True).db))
+        >>> db.url
+        'a:1'
+
+        >>> kf.rm(cfgfile)
+
+
+    Key path queries
+    ================
+
+    Dotted paths of values can be searched with glob patterns, a
+    pattern also matching all paths under the ones it matches::
+
+        >>> cfgfile = kf.mk_tmp_file('''
+        ... db: {host: a, timeout: 1}
+        ... http: {timeout: 2}
+        ... tenants:
+        ...     a: {quota: {disk: 1, cpu: 2}}
+        ...     b: {quota: {disk: 3}}''')
+        >>> cfg = Config(cfgfile)
+        >>> cfg.find_paths("*.timeout")
+        ['db.timeout', 'http.timeout']
+        >>> cfg.find_paths("tenants.*.quota")
+        ['tenants.a.quota.cpu', 'tenants.a.quota.disk', 'tenants.b.quota.disk']
+
+    Paths are relative to the section queried::
+
+        >>> cfg.tenants.find_paths("a")
+        ['a.quota.cpu', 'a.quota.disk']
+        >>> cfg.count_paths(), cfg.tenants.count_paths("b")
+        (6, 1)
+
+    These are served by an index built on first query, and then
+    updated with only the changes made by writes or found by
+    ``reload()``::
+
+        >>> cfg.tenants.b = {'quota': {'cpu': 4}}
+        >>> cfg.find_paths("*.cpu")
+        ['tenants.a.quota.cpu', 'tenants.b.quota.cpu']
+
+        >>> _ = kf.put_contents(cfgfile, "db: {host: a, timeout: 1}")
+        >>> cfg.reload()
+        >>> cfg.find_paths()
+        ['db.host', 'db.timeout']
+
+        >>> kf.rm(cfgfile)
+
+    """
+
+    def __init__(self, config=None, prefix=None, cfg=None, label=None,
+                 compact=False, interpolate=False):
+        self._prefix = prefix if prefix else []
+        self._cfg_manager = config if isinstance(config, Cfg) \
+                            else choose_cfg_manager(config)
+        if compact:
+            self._cfg_manager = CompactCfg(self._cfg_manager)
+        self._provided_cfg = cfg
+        self.__label__ = label
+        ## sub-``Config`` will share the state of their top-level one.
+        self._root = self
+        self._interpolator = Interpolator(lambda: self._cfg) \
+                             if interpolate else None
+        self._subscribers = []
+        self._index = None
+        self._indexes = []  ## ``KeyIndex`` to keep up to date
+        ## ``Interpolator`` of ``MConfig`` using this one as layer
+        self._interpolators = []
+        ## as ``HttpCfg`` can change its tree in background
+        listeners = getattr(self._cfg_manager, "_listeners", None)
+        if cfg is None and listeners is not None:
+            listeners.append(self._reloaded)
 
-    @cache
     @property
     def _cfg(self):
         if self._provided_cfg is not None:
@@ -532,38 +1870,142 @@ class Config(dct.AttrDictAbstract):
         ## this can be overridden at ``init()`` time, by providing a ``cfg``.
         return self._cfg_manager._cfg
 
+    def reload(self):
+        """Parse again the config file on next access
+
+        This is to be called on the top-level ``Config``, any
+        sub-``Config`` will keep giving access to the previous values.
+
+        """
+        root = self._root
+        old = _snapshot(self._cfg) \
+              if root._subscribers or root._indexes else None
+        self._cfg_manager.reload()
+        self._reloaded(old, self._cfg)
+
+    def _reloaded(self, old, new):
+        """Report changes from ``old`` tree to ``new`` one"""
+        root = self._root
+        if root._interpolator is not None:
+            root._interpolator.reloaded()
+        if old is None or not (root._subscribers or root._indexes):
+            return
+        changes = list(diff(old, new, tuple(self._prefix)))
+        _update_indexes(root._indexes, changes)
+        self._notify(changes)
+
+    def _build_index(self):
+        index = KeyIndex(path for path, _value
+                         in _iter_leaves(self._cfg, tuple(self._prefix)))
+        self._indexes.append(index)
+        return index
+
     def __getitem__(self, label):
         res = self._cfg[label]
         if dct.is_dict_like(res):
-            return self.__class__(
+            sub = self.__class__(
                 self._cfg_manager,
                 prefix=self._prefix + [label],
                 cfg=res,
                 label=self.__label__)
+            sub._root = self._root
+            return sub
+        interpolator = self._root._interpolator
+        if interpolator is not None and isinstance(res, basestring):
+            return interpolator.resolve(tuple(self._prefix) + (label, ), res)
         return res
 
     def __iter__(self):
         return self._cfg.__iter__()
 
+    def __reduce__(self):
+        ## subscribers and key index are local to this process
+        return (self.__class__,
+                (self._cfg_manager, self._prefix, self._provided_cfg,
+                 self.__label__, False, self._interpolator is not None),
+                None if self._root is self else {"root": self._root})
+
+    def __setstate__(self, state):
+        self._root = state["root"]
+
+    def _written(self, label, old):
+        self._changed(label, old)
+        self._cfg_manager.save(
+            dirty=[self._prefix[0] if self._prefix else label])
+
+    def _changed(self, label, old):
+        """Report change of value at ``label``, that was ``old``"""
+        path = tuple(self._prefix) + (label, )
+        root = self._root
+        if root._interpolator is not None:
+            root._interpolator.written(path)
+        for interpolator in root._interpolators:
+            interpolator.written(path)
+        if root._indexes:
+            new = self._cfg[label] if label in self._cfg else MISSING
+            _update_indexes(root._indexes, diff(old, new, path))
+
+    def _old_value(self, label):
+        """Return current value at ``label`` if it needs to be indexed"""
+        if self._root._indexes and label in self._cfg:
+            return self._cfg[label]
+        return MISSING
+
     def __setitem__(self, label, value):
+        old = self._old_value(label)
         self._cfg[label] = value
-        self._cfg_manager.save()
+        self._written(label, old)
 
     def __delitem__(self, label):
+        old = self._old_value(label)
         del self._cfg[label]
-        self._cfg_manager.save()
+        self._written(label, old)
+
+    def memory_usage(self):
+        """Return memory used by the values, in bytes
+
+        Returns a dict with the current ``size`` and an estimate of the
+        ``plain_size`` the same values would take as a freshly parsed
+        tree of plain dicts.
+
+        """
+        return {
+            'size': _deep_sizeof(self._cfg),
+            'plain_size': _deep_sizeof(uncompact(self._cfg), shared=False),
+        }
 
     def __repr__(self, ):
         return (
             "<%s %r (%s values%s)>"
             % (self.__class__.__name__,
                self._cfg_manager._filename,
-               len(mdict.mdict(self).flat),
+               ## not building an index only for that
+               self.count_paths() if self._root._index is not None else
+               sum(1 for _leaf in _iter_leaves(self._cfg)),
                (", prefix=%r" % self._prefix)
                if self._prefix else ""))
 
 
-class MConfig(dct.MultiDictReader):
+def _flush_at_exit(ref):
+    cfg = ref()
+    if cfg is not None:
+        cfg.flush()
+
+
+def _resolve_in_stack(trees, path):
+    """Return value at ``path`` of the first tree having it as a leaf"""
+    for tree in trees:
+        try:
+            for key in path:
+                tree = tree[key]
+        except (KeyError, TypeError):
+            continue
+        if not dct.is_dict_like(tree):
+            return tree
+    return MISSING
+
+
+class MConfig(_KeyIndexMixin, _SubscribersMixin, dct.MultiDictReader):
     """Manage multiple cascaded configs
 
 
@@ -619,8 +2061,217 @@ class MConfig(dct.MultiDictReader):
         >>> kf.rm(cfgfile2)
 
 
+    Interpolation
+    =============
+
+    References to other values, in any layer, are resolved if
+    requested::
+
+        >>> cfgfile1 = kf.mk_tmp_file("db:\\n    host: example.com")
+        >>> cfgfile2 = kf.mk_tmp_file('''
+        ... [db]
+        ... port = 5432
+        ... url = pg://${db.host}:${db.port}/''')
+
+        >>> cfg = MConfig.load([('local', cfgfile1), ('global', cfgfile2)],
+        ...                    interpolate=True)
+        >>> cfg.db.url
+        'pg://example.com:5432/'
+
+    Resolved values are memoized, and forgotten on ``reload()`` only if
+    any of the values they depend on changed::
+
+        >>> _ = kf.put_contents(cfgfile1, "db:\\n    host: localhost")
+        >>> cfg.reload()
+        >>> cfg.db.url
+        'pg://localhost:5432/'
+
+    Writes done directly on a layer are seen as well::
+
+        >>> cfg.__cfg_local__.db.host = 'db.example.com'
+        >>> cfg.db.url
+        'pg://db.example.com:5432/'
+
+        >>> kf.rm(cfgfile1)
+        >>> kf.rm(cfgfile2)
+
+
+    In-memory overlay
+    =================
+
+    An in-memory layer can be added on top of the stack. It then
+    receives all writes, that shadow lower layers immediately without
+    touching any file::
+
+        >>> cfgfile1 = kf.mk_tmp_file("db:\\n    host: a\\n    port: 1")
+        >>> cfgfile2 = kf.mk_tmp_file("[db]\\nhost = b\\nuser = c")
+        >>> cfg = MConfig.load([('local', cfgfile1), ('global', cfgfile2)])
+        >>> _ = cfg.add_overlay(flush_to='local')
+
+        >>> cfg.db.host = 'x'
+        >>> cfg['feature'] = {'enabled': True}
+        >>> cfg.db.host, cfg.db.user, cfg.feature.enabled
+        ('x', 'c', True)
+        >>> print(kf.get_contents(cfgfile1).strip())
+        db:
+            host: a
+            port: 1
+
+    Removing a value from the overlay uncovers the one of lower
+    layers::
+
+        >>> del cfg.db.host
+        >>> cfg.db.host
+        'a'
+
+    Only values of the overlay can be removed::
+
+        >>> del cfg.db.user
+        Traceback (most recent call last):
+        ...
+        KeyError: "'user' is not in the overlay, values of other layers ..."
+
+    ``flush()`` writes the overlay values in the ``flush_to`` layer
+    in one save. Overlay values are kept::
+
+        >>> cfg.db.port = 2
+        >>> cfg.flush()
+        >>> print(kf.get_contents(cfgfile1).strip())
+        db:
+          host: a
+          port: 2
+        feature:
+          enabled: true
+        >>> cfg.__cfg_overlay__.db.port
+        2
+
+    If the save fails, the ``flush_to`` layer is left unchanged, and
+    the values will be written by next ``flush()``::
+
+        >>> manager = cfg.__cfg_local__._cfg_manager
+        >>> def save(dirty=None):
+        ...     raise ValueError("disk full")
+        >>> manager.save = save
+        >>> cfg.db.port = 3
+        >>> cfg.flush()
+        Traceback (most recent call last):
+        ...
+        ValueError: disk full
+        >>> cfg.__cfg_local__.db.port
+        2
+
+        >>> del manager.save
+        >>> cfg.flush()
+        >>> cfg.__cfg_local__.db.port
+        3
+        >>> print(kf.get_contents(cfgfile1).strip())
+        db:
+          host: a
+          port: 3
+        feature:
+          enabled: true
+
+    A ``flush_interval`` (in seconds) can be given to ``add_overlay()``
+    to get changes flushed in background, at most once per interval.
+    Changes not flushed yet are flushed when the interpreter exits
+    normally.
+
+        >>> kf.rm(cfgfile1)
+        >>> kf.rm(cfgfile2)
+
+
+    Pickling
+    ========
+
+    Layers are pickled along, with the overlay if any::
+
+        >>> import pickle
+
+        >>> cfgfile1 = kf.mk_tmp_file("db:\\n    host: a")
+        >>> cfgfile2 = kf.mk_tmp_file("[db]\\nhost = b\\nport = 1")
+        >>> cfg = MConfig.load([('local', cfgfile1), ('global', cfgfile2)],
+        ...                    interpolate=True)
+        >>> _ = cfg.add_overlay(flush_to='local')
+        >>> cfg.db.url = "${db.host}:${db.port}"
+
+        >>> cfg2 = pickle.loads(pickle.dumps(cfg))
+        >>> cfg2.db.url
+        'a:1'
+        >>> cfg2.db.host = 'c'
+        >>> cfg2.db.url
+        'c:1'
+        >>> cfg2.flush()
+        >>> print(kf.get_contents(cfgfile1).strip())
+        db:
+          host: c
+          url: ${db.host}:${db.port}
+
+    A sub-``MConfig`` gets its top-level ``MConfig`` along::
+
+        >>> db = pickle.loads(pickle.dumps(cfg.db))
+        >>> db.url
+        'a:1'
+        >>> db.user = 'x'
+        >>> db.user
+        'x'
+
+        >>> kf.rm(cfgfile1)
+        >>> kf.rm(cfgfile2)
+
+
+    Key path queries
+    ================
+
+    As for ``Config``, paths of values can be queried. All layers are
+    indexed, and their changes are followed::
+
+        >>> cfgfile1 = kf.mk_tmp_file("db:\\n    host: a")
+        >>> cfgfile2 = kf.mk_tmp_file("[db]\\nhost = b\\ntimeout = 3")
+        >>> cfg = MConfig.load([('local', cfgfile1), ('global', cfgfile2)])
+        >>> _ = cfg.add_overlay()
+        >>> cfg.find_paths("db")
+        ['db.host', 'db.timeout']
+
+        >>> cfg.db.user = 'x'
+        >>> _ = kf.put_contents(cfgfile2, "[db]\\nhost = b")
+        >>> cfg.reload()
+        >>> cfg.db.find_paths(), cfg.count_paths()
+        (['host', 'user'], 2)
+
+        >>> kf.rm(cfgfile1)
+        >>> kf.rm(cfgfile2)
+
     """
 
+    def __init__(self, dcts, interpolate=False):
+        super(MConfig, self).__init__(dcts)
+        ## sub-``MConfig`` will share the state of their top-level one.
+        self._root = self
+        self._prefix = ()
+        self._interpolator = \
+            Interpolator(lambda: dct.MultiDictReader(self._dcts)) \
+            if interpolate else None
+        if self._interpolator is not None:
+            ## as for ``_indexes``, writes on layers will be reported
+            for d in self._dcts:
+                if isinstance(d, Config):
+                    d._root._interpolators.append(self._interpolator)
+        self._subscribers = []
+        self._overlay = None
+        self._flush_timer = None
+        self._index = None
+
+    def __getitem__(self, label):
+        res = super(MConfig, self).__getitem__(label)
+        if isinstance(res, MConfig):
+            res._root = self._root
+            res._prefix = self._prefix + (label, )
+            return res
+        interpolator = self._root._interpolator
+        if interpolator is not None and isinstance(res, basestring):
+            return interpolator.resolve(self._prefix + (label, ), res)
+        return res
+
     def __getattr__(self, label):
         if label.startswith("__cfg_") and label.endswith("__"):
             cfg_label = label[6:-2]
@@ -633,7 +2284,6 @@ class MConfig(dct.MultiDictReader):
                 % (cfg_label, ", ".join(self.__cfg_labels__.keys())))
         return super(MConfig, self).__getattr__(label)
 
-    @cache
     @property
     def __cfg_labels__(self):
         return dict(
@@ -641,10 +2291,220 @@ class MConfig(dct.MultiDictReader):
             for d in self._dcts
             if isinstance(d.__label__, basestring))
 
+    def add_overlay(self, flush_to=None, flush_interval=None):
+        """Insert an in-memory layer labeled ``overlay`` on top of the stack
+
+        Returns the ``Config`` of the new layer. ``flush_to`` is the label
+        of the layer receiving overlay values on ``flush()``, and if
+        ``flush_interval`` is given, a flush will be scheduled that many
+        seconds after a write.
+
+        """
+        root = self._root
+        if root._overlay is not None:
+            raise ValueError("%r already has an overlay." % (root, ))
+        if flush_to is not None and flush_to not in root.__cfg_labels__:
+            raise ValueError(
+                "No config labeled %r found. Available labels: %s"
+                % (flush_to, ", ".join(root.__cfg_labels__.keys())))
+        root._overlay = Config(OverlayCfg(), label="overlay")
+        root._flush_to = flush_to
+        root._flush_interval = flush_interval
+        root._flush_lock = threading.Lock()
+        root._flush_at_exit()
+        root._dcts.insert(0, root._overlay)
+        if root._index is not None:
+            root._overlay._indexes.append(root._index)
+        if root._interpolator is not None:
+            root._overlay._interpolators.append(root._interpolator)
+        return root._overlay
+
+    def _build_index(self):
+        """Return index of paths of all layers
+
+        Paths are counted once per layer having them, and the index is
+        registered in all ``Config`` layers to be kept up to date.
+
+        """
+        trees = [getattr(d, "_cfg", d) for d in self._dcts]
+        index = KeyIndex(path for tree in trees
+                         for path, _value in _iter_leaves(tree))
+        for d in self._dcts:
+            if isinstance(d, Config):
+                d._root._indexes.append(index)
+        return index
+
+    def _overlay_node(self, label, create=True):
+        """Return overlay sub-``Config`` at current prefix
+
+        It is created if needed, unless ``create`` is False, None being
+        then returned if it doesn't exist.
+
+        """
+        root = self._root
+        if root._overlay is None:
+            raise TypeError(
+                "'%s' object does not support item assignment"
+                % self.__class__.__name__)
+        node = root._overlay
+        for key in self._prefix:
+            if key not in node:
+                if not create:
+                    return None
+                node[key] = {}
+            node = node[key]
+        ## a sub-``MConfig`` built before the overlay had this section
+        ## should see it from now on.
+        if self is not root and \
+               getattr(self._dcts[0], "_cfg", None) is not node._cfg:
+            self._dcts.insert(0, node)
+        return node
+
+    def _flush_at_exit(self):
+        ## the background flush is done by a daemon thread, that would
+        ## not run at exit
+        if self._flush_to is not None:
+            atexit.register(_flush_at_exit, weakref.ref(self))
+
+    def _written(self, label):
+        ## the interpolator was told by the overlay ``Config``
+        root = self._root
+        if root._flush_to is None or root._flush_interval is None:
+            return
+        with root._flush_lock:
+            if root._flush_timer is None:
+                root._flush_timer = threading.Timer(root._flush_interval,
+                                                    root.flush)
+                root._flush_timer.daemon = True
+                root._flush_timer.start()
+
+    def __setitem__(self, label, value):
+        self._overlay_node(label)[label] = value
+        self._written(label)
+
+    def __delitem__(self, label):
+        node = self._overlay_node(label, create=False)
+        if node is None or label not in node:
+            raise KeyError(
+                "%r is not in the overlay, values of other layers "
+                "can't be removed." % (label, ))
+        del node[label]
+        self._written(label)
+
+    def flush(self):
+        """Write overlay values changed since last flush in one save"""
+        root = self._root
+        if root._overlay is None or root._flush_to is None:
+            return
+        with root._flush_lock:
+            if root._flush_timer is not None:
+                root._flush_timer.cancel()
+                root._flush_timer = None
+            keys = root._overlay._cfg_manager.flush_dirty()
+            if not keys:
+                return
+            target = root.__cfg_labels__[root._flush_to]
+            tree = target._cfg
+            overlay = root._overlay._cfg
+            olds = {}
+            for key in keys:
+                if key in overlay:
+                    olds[key] = tree[key] if key in tree else MISSING
+                    tree[key] = _merge(olds[key], copy.deepcopy(overlay[key]))
+            try:
+                target._cfg_manager.save(dirty=keys)
+            except Exception:
+                ## back to the state before, to be flushed again later
+                for key, old in olds.items():
+                    if old is MISSING:
+                        del tree[key]
+                    else:
+                        tree[key] = old
+                root._overlay._cfg_manager.save(dirty=keys)
+                raise
+            for key, old in olds.items():
+                target._changed(key, old)
+
+    def reload(self):
+        """Reload all underlying configs
+
+        Subscribers are notified of changes of the resolved values::
+
+            >>> import kids.file as kf
+            >>> cfgfile1 = kf.mk_tmp_file("db:\\n    host: a")
+            >>> cfgfile2 = kf.mk_tmp_file("db:\\n    host: b\\n    port: 1")
+            >>> cfg = MConfig.load([('local', cfgfile1),
+            ...                     ('global', cfgfile2)])
+            >>> cfg.db.port
+            1
+
+            >>> def show(changes):
+            ...     print(changes)
+            >>> cfg.subscribe("db.*", show)
+
+        Here, ``db.host`` changes in the global file but is shadowed
+        by the local file, so only ``db.port`` is reported::
+
+            >>> _ = kf.put_contents(cfgfile2, "db:\\n    host: c\\n    port: 2")
+            >>> cfg.reload()
+            [('db.port', 1, 2)]
+
+            >>> kf.rm(cfgfile1)
+            >>> kf.rm(cfgfile2)
+
+        """
+        root = self._root
+        trees = [getattr(d, "_cfg", d) for d in self._dcts]
+        olds = [_snapshot(tree) for tree in trees] \
+               if root._subscribers else None
+        for d in self._dcts:
+            d.reload()
+        if root._interpolator is not None:
+            root._interpolator.reloaded()
+        if olds is None:
+            return
+        news = [getattr(d, "_cfg", d) for d in self._dcts]
+        paths = set()
+        for old, new in zip(olds, news):
+            paths.update(path for path, _o, _n in diff(old, new))
+        changes = []
+        for path in sorted(paths):
+            old_value = _resolve_in_stack(olds, path)
+            new_value = _resolve_in_stack(news, path)
+            if old_value is MISSING and new_value is MISSING:
+                continue
+            if old_value is MISSING or new_value is MISSING or \
+                   old_value != new_value:
+                changes.append((self._prefix + path, old_value, new_value))
+        self._notify(changes)
+
+    def __reduce__(self):
+        state = {}
+        if self._root is not self:
+            ## overlay and interpolator are the ones of the root
+            state = {"root": self._root, "prefix": self._prefix}
+        elif self._overlay is not None:
+            state = {"overlay": self._overlay, "flush_to": self._flush_to,
+                     "flush_interval": self._flush_interval}
+        return (self.__class__, (self._dcts, self._interpolator is not None),
+                state or None)
+
+    def __setstate__(self, state):
+        if "root" in state:
+            self._root = state["root"]
+            self._prefix = state["prefix"]
+            return
+        self._overlay = state["overlay"]
+        self._flush_to = state["flush_to"]
+        self._flush_interval = state["flush_interval"]
+        self._flush_lock = threading.Lock()
+        self._flush_at_exit()
+
     @classmethod
-    def load(cls, filenames, config_factory=Config):
+    def load(cls, filenames, config_factory=Config, interpolate=False):
         """Loads data from a config file."""
-        return cls([config_factory(f, label=label) for label, f in filenames])
+        return cls([config_factory(f, label=label) for label, f in filenames],
+                   interpolate=interpolate)
 
     def __repr__(self):
         return ("<%s %r>"
@@ -652,37 +2512,710 @@ class MConfig(dct.MultiDictReader):
                    self._dcts))
 
 
+class _RegisteredCfg(Cfg):
+    """Wrapper of the config manager of a ``ConfigRegistry`` entry
+
+    Parsing again an evicted tree goes through the registry.
+
+    """
+
+    def __init__(self, registry, path, cfg_manager):
+        super(_RegisteredCfg, self).__init__(cfg_manager._filename)
+        self._registry = registry
+        self._path = path
+        self._cfg_manager = cfg_manager
+
+    ## other processes will use the wrapped manager directly
+    def __getstate__(self):
+        state = super(_RegisteredCfg, self).__getstate__()
+        state["_registry"] = None
+        return state
+
+    @property
+    def _cfg(self):
+        registry = self._registry
+        if registry is None:
+            return self._cfg_manager._cfg
+        while True:
+            ## under the lock, the tree can't be evicted while we get it
+            with registry._lock:
+                if self._path in registry._loaded:
+                    registry._loaded[self._path] = \
+                        registry._loaded.pop(self._path)
+                    return self._cfg_manager._cfg
+            registry._load(self._path)
+
+    def unload(self):
+        self._cfg_manager.unload()
+
+    def reload(self):
+        self._cfg_manager.reload()
+
+    def save(self, dirty=None):
+        self._cfg_manager.save(dirty)
+
+
+class ConfigRegistry(object):
+    """Shared ``Config`` instances with a bounded number of parsed trees
+
+    Config instances are shared per path, and each file is parsed only
+    once, even with concurrent callers::
+
+        >>> import kids.file as kf
+        >>> tmpdir = kf.mk_tmp_dir()
+        >>> paths = []
+        >>> for i in range(3):
+        ...     paths.append(os.path.join(tmpdir, 't%d.rc' % i))
+        ...     _ = kf.put_contents(paths[-1], 'id = %d\\n' % i)
+
+        >>> registry = ConfigRegistry(max_entries=2)
+        >>> cfg0 = registry.get(paths[0])
+        >>> cfg0.id
+        0
+        >>> registry.get(paths[0]) is cfg0
+        True
+
+    Least recently used parsed trees are forgotten to respect
+    ``max_entries`` (and ``max_size`` in bytes if given)::
+
+        >>> registry.get(paths[1]).id
+        1
+        >>> registry.get(paths[2]).id
+        2
+        >>> from pprint import pprint as pp
+        >>> pp(registry.stats())
+        {'entries': 2, 'evictions': 1, 'hits': 1, 'misses': 3, 'size': 0}
+
+    An evicted tree is parsed again when needed, be it by ``get()`` or
+    by using a ``Config`` it returned, and it is then accounted for
+    again::
+
+        >>> cfg0.id
+        0
+        >>> registry.get(paths[0]) is cfg0
+        True
+        >>> pp(registry.stats())
+        {'entries': 2, 'evictions': 2, 'hits': 2, 'misses': 4, 'size': 0}
+
+    Using a ``Config`` makes its tree the most recently used one, as
+    ``get()`` does::
+
+        >>> cfg2 = registry.get(paths[2])
+        >>> cfg0.id
+        0
+        >>> registry.get(paths[1]).id
+        1
+        >>> misses = registry.stats()['misses']
+        >>> cfg0.id
+        0
+        >>> registry.stats()['misses'] == misses
+        True
+
+    Only ``Config`` instances of parsed trees, or still used elsewhere,
+    are kept by the registry.
+
+        >>> kf.rm(tmpdir, recursive=True, force=True)
+
+    """
+
+    def __init__(self, max_entries=None, max_size=None,
+                 config_factory=Config):
+        self.max_entries = max_entries
+        self.max_size = max_size
+        self._config_factory = config_factory
+        self._configs = weakref.WeakValueDictionary()  ## path -> Config
+        ## path -> (size, Config) of parsed trees, in LRU order
+        self._loaded = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self._path_locks = {}  ## path -> [lock, number of users]
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, path):
+        """Return the shared ``Config`` of ``path``, parsed"""
+        with self._lock:
+            if path in self._loaded:
+                self.hits += 1
+                entry = self._loaded[path] = self._loaded.pop(path)
+                return entry[1]
+        return self._load(path)
+
+    def _load(self, path):
+        """Parse ``path`` if not parsed, and return its ``Config``"""
+        with self._lock:
+            path_lock = self._path_locks.setdefault(
+                path, [threading.Lock(), 0])
+            path_lock[1] += 1
+        try:
+            with path_lock[0]:
+                with self._lock:
+                    if path in self._loaded:
+                        ## parsed by a concurrent caller meanwhile
+                        self.hits += 1
+                        return self._loaded[path][1]
+                    config = self._configs.get(path)
+                if config is None:
+                    config = self._config_factory(path)
+                    config._cfg_manager = _RegisteredCfg(
+                        self, path, config._cfg_manager)
+                tree = config._cfg_manager._cfg_manager._cfg
+                size = _deep_sizeof(tree) if self.max_size else 0
+                with self._lock:
+                    self.misses += 1
+                    self._configs[path] = config
+                    self._loaded[path] = (size, config)
+                    self._size += size
+                    self._evict(keep=path)
+                return config
+        finally:
+            with self._lock:
+                path_lock[1] -= 1
+                if not path_lock[1]:
+                    del self._path_locks[path]
+
+    def _evict(self, keep):
+        while (self.max_entries is not None and
+               len(self._loaded) > self.max_entries) or \
+              (self.max_size is not None and self._size > self.max_size):
+            oldest = next(iter(self._loaded))
+            if oldest == keep:
+                break
+            size, config = self._loaded.pop(oldest)
+            self._size -= size
+            config._cfg_manager.unload()
+            self.evictions += 1
+
+    def stats(self):
+        with self._lock:
+            return {'entries': len(self._loaded), 'size': self._size,
+                    'hits': self.hits, 'misses': self.misses,
+                    'evictions': self.evictions}
+
+
+## name -> class of config managers that workers of ``load_many()`` can
+## send back, as manager classes are not all picklable.
+_MANAGERS = dict((cm.__name__, cm)
+                 for cm in _GENERIC_CFG + [IniCfg, DirCfg, HttpCfg, EnvCfg])
+
+
+def _load_one(path):
+    """Parse ``path``, this is run in ``load_many()`` worker processes"""
+    try:
+        manager = choose_cfg_manager(path)
+        tree = manager._cfg
+    except Exception as e:
+        return path, None, e
+    if isinstance(manager, PyCfg):
+        ## python config files can hold about anything
+        try:
+            pickle.dumps(tree)
+        except Exception:
+            tree = None
+    return path, manager.__class__.__name__, tree
+
+
+def load_many(paths, workers=None, as_config=False, ordered=True):
+    """Parse a lot of config files using a pool of ``workers`` processes
+
+    Yields ``(path, result)`` as soon as results are available, in
+    the order of ``paths`` unless ``ordered`` is False. ``result`` is
+    the parsed tree, or a ``Config`` instance if ``as_config`` is set.
+    If the file could not be parsed, ``result`` is the exception::
+
+        >>> import kids.file as kf
+        >>> tmpdir = kf.mk_tmp_dir()
+        >>> good = os.path.join(tmpdir, 'good.rc')
+        >>> bad = os.path.join(tmpdir, 'bad.rc')
+        >>> _ = kf.put_contents(good, 'a:\\n  - 1\\n  - 2\\n')
+        >>> _ = kf.put_contents(bad, 'XXX%%%: !!')
+
+        >>> for path, res in load_many([good, bad], workers=2):
+        ...     print("%s: %r" % (os.path.basename(path), res))
+        good.rc: {'a': [1, 2]}
+        bad.rc: SyntaxError(...)
+
+        >>> cfgs = dict(load_many([good], workers=2, as_config=True))
+        >>> cfgs[good].a
+        [1, 2]
+
+    Use ``workers=1`` to parse in the current process. This is also
+    what is done where processes can't be started, as in the worker
+    processes of a pool, so that a ``DirCfg`` with a lot of fragments
+    (see ``DirCfg.parallel_threshold``) can be parsed in workers::
+
+        >>> confd = os.path.join(tmpdir, 'app.d')
+        >>> os.mkdir(confd)
+        >>> for i in range(20):
+        ...     _ = kf.put_contents(os.path.join(confd, '%02d.rc' % i),
+        ...                         '[s%d]\\nx = %d\\n' % (i, i))
+        >>> [(os.path.basename(path), len(res))
+        ...  for path, res in load_many([confd], workers=2)]
+        [('app.d', 20)]
+
+        >>> kf.rm(tmpdir, recursive=True, force=True)
+
+    """
+    paths = list(paths)
+    pool = None
+    if workers != 1:
+        import multiprocessing
+        workers = workers or multiprocessing.cpu_count()
+        ## daemonic processes, as ``Pool`` workers, can't have children
+        if not multiprocessing.current_process().daemon:
+            try:
+                pool = multiprocessing.Pool(workers)
+            except (AssertionError, ImportError, OSError):
+                pool = None
+    if pool is None:
+        results = (_load_one(path) for path in paths)
+    else:
+        ## as ``Pool.map()`` does, to send paths in a few batches
+        chunksize, extra = divmod(len(paths), workers * 4)
+        results = (pool.imap if ordered else pool.imap_unordered)(
+            _load_one, paths, chunksize + 1 if extra else max(chunksize, 1))
+    try:
+        for path, name, tree in results:
+            if name is None:
+                yield path, tree
+                continue
+            if not as_config and tree is not None:
+                yield path, tree
+                continue
+            try:
+                manager = _MANAGERS[name](path)
+                if tree is not None:
+                    _CFG_CACHE[manager] = tree
+                result = manager._cfg if not as_config else Config(manager)
+            except Exception as e:
+                result = e
+            yield path, result
+    finally:
+        if pool is not None:
+            pool.terminate()
+            pool.join()
+
+
+_config_getitem = Config.__dict__["__getitem__"]
+_trackers = []  ## started ``AccessTracker``
+_trackers_lock = threading.Lock()
+
+
+def _tracking_getitem(config, label):
+    """``Config.__getitem__`` while at least one tracker is started"""
+    res = _config_getitem(config, label)
+    for tracker in list(_trackers):
+        tracker._record(config, label, res)
+    return res
+
+
+class AccessTracker(object):
+    """Record how often config values are read, and from which layer
+
+    Only reads of ``cfg`` (a ``Config`` or a ``MConfig``) are recorded,
+    or reads of any ``Config`` if not given. Tracking is done by
+    wrapping ``Config.__getitem__`` only while a tracker is started, so
+    there's no cost at all when not tracking::
+
+        >>> import kids.file as kf
+        >>> cfgfile1 = kf.mk_tmp_file("db:\\n    host: a")
+        >>> cfgfile2 = kf.mk_tmp_file("db:\\n    host: b\\n    port: 1\\nx: 1")
+        >>> cfg = MConfig.load([('local', cfgfile1), ('global', cfgfile2)])
+
+        >>> with AccessTracker(cfg) as tracker:
+        ...     for i in range(3):
+        ...         _ = cfg.db.host
+        ...     _ = cfg.db.port
+
+        >>> tracker.print_report()
+        count  layer   path
+            3  local   db.host
+            1  global  db.port
+
+    Sections reads are not reported, but their values not read are::
+
+        >>> tracker.dead_keys()
+        ['x']
+
+    Trackers can be nested, each one recording only the reads of its
+    config::
+
+        >>> other = Config(cfgfile2)
+        >>> with AccessTracker(cfg) as outer:
+        ...     with AccessTracker(other) as inner:
+        ...         _ = cfg.db.host
+        ...         _ = other.x
+        ...     _ = cfg.db.host
+        >>> outer.report(), inner.report()
+        ([(2, 'local', 'db.host')], [(1, None, 'x')])
+        >>> Config.__getitem__ is _config_getitem
+        True
+
+    With ``sample=N``, only one read over N is recorded, and counts
+    are estimated accordingly.
+
+        >>> kf.rm(cfgfile1)
+        >>> kf.rm(cfgfile2)
+
+    """
+
+    def __init__(self, cfg=None, sample=1, report_at_exit=False):
+        self.cfg = cfg
+        self.sample = sample
+        self.counts = {}  ## (path, layer label) -> count
+        self._reads = 0
+        self._roots = None  ## ids of top-level ``Config`` tracked
+        if report_at_exit:
+            atexit.register(self.print_report, sys.stderr)
+
+    def start(self):
+        if self.cfg is not None:
+            layers = self.cfg._dcts if isinstance(self.cfg, MConfig) \
+                     else [self.cfg]
+            self._roots = set(id(d._root) for d in layers
+                              if isinstance(d, Config))
+        with _trackers_lock:
+            if self in _trackers:
+                return
+            if not _trackers:
+                Config.__getitem__ = _tracking_getitem
+            _trackers.append(self)
+
+    def stop(self):
+        with _trackers_lock:
+            if self not in _trackers:
+                return
+            _trackers.remove(self)
+            if not _trackers:
+                Config.__getitem__ = _config_getitem
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def _record(self, config, label, res):
+        if self._roots is not None and id(config._root) not in self._roots:
+            return
+        self._reads += 1
+        if self._reads % self.sample or isinstance(res, Config):
+            return
+        key = (".".join(str(k) for k in config._prefix + [label]),
+               config.__label__)
+        self.counts[key] = self.counts.get(key, 0) + self.sample
+
+    def report(self):
+        """Return ``(count, layer label, path)`` by decreasing count"""
+        return sorted(((count, layer, path)
+                       for (path, layer), count in self.counts.items()),
+                      key=lambda r: (-r[0], r[2], str(r[1])))
+
+    def print_report(self, out=None):
+        out = sys.stdout if out is None else out
+        out.write("count  layer   path\n")
+        for count, layer, path in self.report():
+            out.write("%5d  %-6s  %s\n" % (count, layer or "-", path))
+
+    def dead_keys(self, cfg=None):
+        """Return sorted paths of values of ``cfg`` that were never read
+
+        ``cfg`` defaults to the tracked one.
+
+        """
+        cfg = self.cfg if cfg is None else cfg
+        layers = cfg._dcts if isinstance(cfg, MConfig) else [cfg]
+        read = set(path for path, _layer in self.counts)
+        return sorted(set(
+            ".".join(str(k) for k in path)
+            for layer in layers
+            for path, _value in _iter_leaves(layer._cfg)) - read)
+
+
 def load(basename=None, raise_on_all_missing=False, config_file=None,
-         local_path=None, config_struct=None, config_factory=Config):
-    """Load local script configuration."""
+         local_path=None, config_struct=None, config_factory=Config,
+         discovery_cache=None, conf_d=False, interpolate=False, env=False):
+    """Load local script configuration.
+
+    If you are calling ``load()`` repeatedly, you can provide a
+    ``DiscoveryCache`` instance as ``discovery_cache`` to avoid
+    checking again for the existence of all candidate files. Note that
+    it saves system calls between calls only if its ``ttl`` is set, as
+    otherwise each directory is checked again on each call.
+
+    With ``conf_d`` set, each standard config file location is
+    preceded by a ``.d`` directory of fragments (as ``/etc/foo.rc.d``)
+    that will take precedence over it. These layers are labelled with
+    a ``_d`` suffix (as ``system_d``).
+
+    ``interpolate`` enables resolution of ``${section.key}`` references
+    in values (see ``kids.cfg.interpolate``).
+
+    With ``env`` set, environment variables as ``FOO__DB__HOST`` take
+    precedence over all files, in a layer labelled ``env`` (see
+    ``EnvCfg``)::
+
+        >>> import kids.file as kf
+        >>> tmpdir = kf.mk_tmp_dir()
+        >>> _ = kf.put_contents(os.path.join(tmpdir, '.foo.rc'),
+        ...                     "[db]\\nhost = a\\nport = 1")
+
+        >>> os.environ['FOO__DB__PORT'] = '2'
+        >>> cfg = load('foo', local_path=tmpdir, env=True)
+        >>> cfg.db.host, cfg.db.port
+        ('a', 2)
+
+        >>> del os.environ['FOO__DB__PORT']
+        >>> kf.rm(tmpdir, recursive=True, force=True)
+
+    """
 
     if basename is None:
         ## try to infer the basename of the current executable to
         ## get the various places where it could be stored.
         basename = kf.basename(sys.argv[0], ".py")
     if config_struct is None:
-        config_struct = [
-            ## Typically forced config file location via command line:
-            (True, False, lambda: config_file),
-            ## Environment variable config file location:
-            (True, False, lambda: os.environ.get('%s_CONFIG_FILENAME'
-                                                 % basename.upper())),
-        ]
-        if local_path:
-            config_struct.append(
-                (False, "local", lambda: os.path.join(local_path,
-                                                   '.%s.rc' % basename)))
-        config_struct.extend([
-            ## Standard cascaded paths
-            (False, "global", lambda: os.path.expanduser('~/.%s.rc' % basename)),
-            (False, "system", lambda: '/etc/%s.rc' % basename),
-        ])
-
-    filenames = _find_files(config_struct, raise_on_all_missing)
-    return MConfig.load(filenames, config_factory=config_factory)
-
-
-def _find_files(research_structure, raise_on_all_missing=True):
+        config_struct = _default_config_struct(basename, config_file,
+                                               local_path, conf_d)
+
+    filenames = _find_files(
+        config_struct, raise_on_all_missing,
+        exists=discovery_cache.snapshot() if discovery_cache else
+        os.path.exists)
+    if env:
+        filenames.insert(0, ("env", EnvCfg(
+            "%s__" % re.sub(r"\W", "_", basename.upper()))))
+    return MConfig.load(filenames, config_factory=config_factory,
+                        interpolate=interpolate)
+
+
+def find_config_files(basenames, raise_on_all_missing=False,
+                      local_path=None, discovery_cache=None):
+    """Return the config files ``load()`` would use for each basename
+
+    This is meant to resolve config files of a lot of applications (or
+    plugins) at once::
+
+        >>> import kids.file as kf
+        >>> tmpdir = kf.mk_tmp_dir()
+        >>> kf.touch(os.path.join(tmpdir, '.foo.rc'))
+
+        >>> res = find_config_files(['foo', 'bar'], local_path=tmpdir)
+        >>> res['foo'][0] == ('local', os.path.join(tmpdir, '.foo.rc'))
+        True
+        >>> res['bar'][0] == ('local', os.path.join(tmpdir, '.bar.rc'))
+        True
+
+    Each search directory is checked and scanned only once for all
+    basenames, as existence checks are done through a snapshot of a
+    ``DiscoveryCache`` (see ``DiscoveryCache.snapshot()``). You can
+    provide your own to keep its results across calls, which saves
+    system calls only if its ``ttl`` is set.
+
+        >>> kf.rm(tmpdir, recursive=True, force=True)
+
+    """
+    if discovery_cache is None:
+        discovery_cache = DiscoveryCache()
+    exists = discovery_cache.snapshot()
+    return dict(
+        (basename,
+         _find_files(_default_config_struct(basename, local_path=local_path),
+                     raise_on_all_missing, exists=exists))
+        for basename in basenames)
+
+
+def _existing_entries(dirname):
+    """Return names of ``dirname`` for which ``os.path.exists`` is true
+
+    Only symlinks need to be checked, which ``scandir`` tells without
+    any additional system call.
+
+    """
+    scandir = getattr(os, "scandir", None)
+    if scandir is None:  ## pragma: no cover
+        return frozenset(name for name in os.listdir(dirname)
+                         if os.path.exists(os.path.join(dirname, name)))
+    return frozenset(entry.name for entry in scandir(dirname)
+                     if not entry.is_symlink() or
+                     os.path.exists(entry.path))
+
+
+class DiscoveryCache(object):
+    """Cache of file existence checks
+
+    Existence of a file is answered from a cached listing of its
+    directory. This listing is revalidated by checking the
+    modification time of the directory, and if ``ttl`` is set, it is
+    trusted without any check for ``ttl`` seconds.
+
+        >>> import kids.file as kf
+        >>> tmpdir = kf.mk_tmp_dir()
+        >>> foo = os.path.join(tmpdir, 'foo.rc')
+
+        >>> dc = DiscoveryCache()
+        >>> dc.exists(foo)
+        False
+        >>> kf.touch(foo)
+        >>> dc.exists(foo)
+        True
+
+    With a ``ttl``, results, be them negative or positive, are
+    remembered without any system call::
+
+        >>> dc = DiscoveryCache(ttl=3600)
+        >>> dc.exists(foo)
+        True
+        >>> kf.rm(foo)
+        >>> dc.exists(foo)
+        True
+
+    Until you clear the cache::
+
+        >>> dc.clear()
+        >>> dc.exists(foo)
+        False
+
+    Missing directories are cached also::
+
+        >>> dc.exists(os.path.join(tmpdir, 'nowhere', 'foo.rc'))
+        False
+
+    Names found in the listing are checked as ``os.path.exists`` would,
+    so a broken symlink does not exist::
+
+        >>> dc = DiscoveryCache()
+        >>> os.symlink(os.path.join(tmpdir, 'missing'), foo)
+        >>> dc.exists(foo)
+        False
+
+        >>> kf.rm(tmpdir, recursive=True, force=True)
+
+    """
+
+    ## a directory modified less than this many seconds before it was
+    ## listed could have been modified again in the same mtime tick
+    ## (some filesystems have a 2 seconds resolution).
+    mtime_resolution = 2
+
+    def __init__(self, ttl=None):
+        self.ttl = ttl
+        ## dirname -> (time of last check, mtime, entries, listing time)
+        self._dirs = {}
+
+    def clear(self):
+        self._dirs = {}
+
+    def _entries(self, dirname):
+        now = time.time()
+        cached = self._dirs.get(dirname)
+        if cached is not None and self.ttl is not None and \
+               now - cached[0] < self.ttl:
+            return cached[2]
+        try:
+            st = os.stat(dirname)
+        except OSError:
+            mtime = None
+        else:
+            mtime = getattr(st, "st_mtime_ns", st.st_mtime)
+        if mtime is None:
+            entries, listed = frozenset(), now
+        elif cached is not None and cached[1] == mtime and \
+                 cached[3] - st.st_mtime > self.mtime_resolution:
+            entries, listed = cached[2], cached[3]
+        else:
+            listed = now
+            try:
+                entries = _existing_entries(dirname)
+            except OSError:
+                ## not listable, we'll need to check each file
+                entries = None
+        self._dirs[dirname] = (now, mtime, entries, listed)
+        return entries
+
+    def exists(self, path, _checked=None):
+        dirname, name = os.path.split(os.path.abspath(path))
+        if _checked is None or dirname not in _checked:
+            entries = self._entries(dirname)
+            if _checked is not None:
+                _checked.add(dirname)
+        else:
+            entries = self._dirs[dirname][2]
+        if entries is None:
+            return os.path.exists(path)
+        return name in entries
+
+    def snapshot(self):
+        """Return an ``exists`` function checking directories only once
+
+        This is meant for a batch of checks, during which changes of
+        directories can be ignored. Each directory is then checked at
+        most once, whatever the ``ttl``::
+
+            >>> import kids.file as kf
+            >>> tmpdir = kf.mk_tmp_dir()
+            >>> kf.touch(os.path.join(tmpdir, 'foo.rc'))
+
+            >>> stats = []
+            >>> stat = os.stat
+            >>> os.stat = lambda path, *a, **kw: \\
+            ...     stats.append(path) or stat(path, *a, **kw)
+            >>> exists = DiscoveryCache().snapshot()
+            >>> [exists(os.path.join(tmpdir, name))
+            ...  for name in ('a.rc', 'b.rc', 'foo.rc')]
+            [False, False, True]
+            >>> os.stat = stat
+            >>> stats == [tmpdir]
+            True
+
+            >>> kf.rm(tmpdir, recursive=True, force=True)
+
+        """
+        checked = set()
+        return lambda path: self.exists(path, checked)
+
+
+def _default_config_struct(basename, config_file=None, local_path=None,
+                           conf_d=False):
+    """Return the research structure used by ``load()``
+
+    See ``_find_files`` for the format of the returned value.
+
+        >>> [label for _, label, _ in
+        ...  _default_config_struct('foo', conf_d=True)]
+        [False, False, 'global_d', 'global', 'system_d', 'system']
+
+    """
+    config_struct = [
+        ## Typically forced config file location via command line:
+        (True, False, lambda: config_file),
+        ## Environment variable config file location:
+        (True, False, lambda: os.environ.get('%s_CONFIG_FILENAME'
+                                             % basename.upper())),
+    ]
+    if local_path:
+        config_struct.append(
+            (False, "local", lambda: os.path.join(local_path,
+                                               '.%s.rc' % basename)))
+    config_struct.extend([
+        ## Standard cascaded paths
+        (False, "global", lambda: os.path.expanduser('~/.%s.rc' % basename)),
+        (False, "system", lambda: '/etc/%s.rc' % basename),
+    ])
+    if conf_d:
+        config_struct[2:] = [
+            elt
+            for _enforce, label, fun in config_struct[2:]
+            for elt in [
+                (False, "%s_d" % label, lambda fun=fun: "%s.d" % fun()),
+                (False, label, fun)]]
+    return config_struct
+
+
+def _find_files(research_structure, raise_on_all_missing=True,
+                exists=os.path.exists):
     """Returns list of existing filename matching research_structure specs.
 
     The research structure allows to define a policy to find files in a
@@ -819,7 +3352,7 @@ def _find_files(research_structure, raise_on_all_missing=True):
             continue
         paths_searched.append(candidate)
         filenames.append((cascaded, candidate))
-        if os.path.exists(candidate):
+        if exists(candidate):
             found.append(candidate)
             if cascaded is False:
                 break
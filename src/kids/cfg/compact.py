@@ -0,0 +1,192 @@
+# -*- coding: utf-8 -*-
+"""Memory-compact representation of parsed config trees
+
+Parsed configs often contain a lot of small dicts sharing the same
+keys. ``compact()`` converts such a tree in ``CompactDict`` nodes where
+keys are stored once per distinct key set (a layout), and strings
+(keys and values) are interned::
+
+    >>> from pprint import pprint as pp
+
+    >>> tree = {'a': {'host': 'h', 'port': 1},
+    ...         'b': {'host': 'h', 'port': 2}}
+    >>> ctree = compact(tree)
+    >>> ctree['a']['port'], ctree['b']['port']
+    (1, 2)
+    >>> ctree['a']._layout is ctree['b']._layout
+    True
+
+It's a full mutable mapping::
+
+    >>> ctree['b']['enabled'] = True
+    >>> del ctree['a']['host']
+    >>> pp(uncompact(ctree))
+    {'a': {'port': 1}, 'b': {'enabled': True, 'host': 'h', 'port': 2}}
+
+Pickling keeps layouts shared::
+
+    >>> import pickle
+    >>> ctree = pickle.loads(pickle.dumps(compact(tree), 0))
+    >>> ctree['a']._layout is ctree['b']._layout
+    True
+
+Layouts no longer used by any node are forgotten, so that adding and
+removing a lot of distinct keys doesn't grow memory::
+
+    >>> node = ctree['a']
+    >>> for i in range(100):
+    ...     node['k%d' % i] = i
+    ...     del node['k%d' % i]
+    >>> len(node._layout.table.layouts)
+    2
+
+"""
+
+import weakref
+
+from kids.data import dct
+
+
+try:
+    basestring
+except NameError:  ## pragma: no cover
+    basestring = str
+
+
+class _Layout(object):
+    """Shared key set of ``CompactDict`` nodes"""
+
+    __slots__ = ("keys", "index", "table", "__weakref__")
+
+    def __init__(self, keys, table):
+        self.keys = keys
+        self.index = dict((k, i) for i, k in enumerate(keys))
+        self.table = table
+
+    ## the table is given as state, as it refers back to its layouts
+    def __reduce__(self):
+        return _Layout, (self.keys, None), self.table
+
+    def __setstate__(self, table):
+        self.table = table
+
+
+class _Compactor(object):
+
+    def __init__(self):
+        self.strings = {}
+        self.layouts = weakref.WeakValueDictionary()
+
+    def __getstate__(self):
+        return {"strings": self.strings, "layouts": dict(self.layouts)}
+
+    def __setstate__(self, state):
+        self.strings = state["strings"]
+        self.layouts = weakref.WeakValueDictionary(state["layouts"])
+
+    def intern(self, value):
+        return self.strings.setdefault(value, value)
+
+    def layout(self, keys):
+        keys = tuple(keys)
+        layout = self.layouts.get(keys)
+        if layout is None:
+            layout = self.layouts[keys] = _Layout(keys, self)
+        return layout
+
+    def compact(self, value):
+        if dct.is_dict_like(value):
+            keys = [self.intern(k) if isinstance(k, basestring) else k
+                    for k in value]
+            return CompactDict(self.layout(keys),
+                               tuple(self.compact(value[k]) for k in keys))
+        if isinstance(value, list):
+            return [self.compact(v) for v in value]
+        if isinstance(value, basestring):
+            return self.intern(value)
+        return value
+
+
+class CompactDict(object):
+    """Mapping storing its values in a tuple, its keys in a shared layout"""
+
+    __slots__ = ("_layout", "_values")
+
+    def __init__(self, layout, values):
+        self._layout = layout
+        self._values = values
+
+    def __reduce__(self):
+        return CompactDict, (self._layout, self._values)
+
+    def __getitem__(self, key):
+        return self._values[self._layout.index[key]]
+
+    def __iter__(self):
+        return iter(self._layout.keys)
+
+    def __len__(self):
+        return len(self._values)
+
+    def __contains__(self, key):
+        return key in self._layout.index
+
+    def get(self, key, default=None):
+        idx = self._layout.index.get(key)
+        return default if idx is None else self._values[idx]
+
+    def keys(self):
+        return list(self._layout.keys)
+
+    def values(self):
+        return list(self._values)
+
+    def items(self):
+        return list(zip(self._layout.keys, self._values))
+
+    def __setitem__(self, key, value):
+        idx = self._layout.index.get(key)
+        if idx is not None:
+            self._values = self._values[:idx] + (value, ) + \
+                           self._values[idx + 1:]
+            return
+        table = self._layout.table
+        if isinstance(key, basestring):
+            ## only reuse interned strings, new keys would be kept forever
+            key = table.strings.get(key, key)
+        self._layout = table.layout(self._layout.keys + (key, ))
+        self._values = self._values + (value, )
+
+    def __delitem__(self, key):
+        idx = self._layout.index[key]
+        keys = self._layout.keys
+        self._layout = self._layout.table.layout(keys[:idx] + keys[idx + 1:])
+        self._values = self._values[:idx] + self._values[idx + 1:]
+
+    def __eq__(self, other):
+        if not dct.is_dict_like(other):
+            return NotImplemented
+        return uncompact(self) == uncompact(other)
+
+    def __ne__(self, other):
+        res = self.__eq__(other)
+        return res if res is NotImplemented else not res
+
+    __hash__ = None
+
+    def __repr__(self):
+        return repr(uncompact(self))
+
+
+def compact(tree):
+    """Return a memory-compact copy of ``tree`` made of ``CompactDict``"""
+    return _Compactor().compact(tree)
+
+
+def uncompact(value):
+    """Return a copy of ``value`` where all dict-like are plain dicts"""
+    if dct.is_dict_like(value):
+        return dict((k, uncompact(value[k])) for k in value)
+    if isinstance(value, list):
+        return [uncompact(v) for v in value]
+    return value
@@ -0,0 +1,263 @@
+# -*- coding: utf-8 -*-
+"""Diagnostic tools for config loading
+
+This is what ``python -m kids.cfg`` runs.
+
+"""
+
+from __future__ import print_function
+
+import argparse
+import os
+import os.path
+import pickle
+import sys
+import time
+
+import kids.file as kf
+import kids.cfg as kc
+
+
+def _ms(seconds):
+    return "%.3f ms" % (seconds * 1000.0)
+
+
+def _human_size(size):
+    for unit in ("B", "KiB", "MiB"):
+        if size < 1024:
+            return "%.1f %s" % (size, unit) if unit != "B" else "%d B" % size
+        size /= 1024.0
+    return "%.1f GiB" % size
+
+
+def profile(basename=None, config_file=None, local_path=None,
+            out=None):
+    """Print how a ``load()`` call with same arguments spends its time
+
+    Here's a typical output::
+
+        >>> import kids.file as kf
+        >>> tmpdir = kf.mk_tmp_dir()
+        >>> _ = kf.put_contents(os.path.join(tmpdir, '.foo.rc'),
+        ...                     'a:\\n    b: 1\\nx: 2\\n')
+
+        >>> profile('foo', local_path=tmpdir)
+        Search paths:
+          found    ... ms  local   .../.foo.rc
+          missing  ... ms  global  .../.foo.rc
+          missing  ... ms  system  /etc/foo.rc
+        Detection of .../.foo.rc:
+          PyCfg         failed   ... ms  (SyntaxError: ...)
+          ...Cfg        failed   ... ms  (...)
+          YamlCfg       chosen   ... ms
+          reparse:               ... ms
+        Layer stack:
+          local   YamlCfg  2 keys  ... B  .../.foo.rc
+        Total: 2 keys, ... B, ... ms
+
+    A missing file that ``load()`` would refuse is reported, and the
+    profile goes on with the other ones::
+
+        >>> profile('foo', config_file=os.path.join(tmpdir, 'nope.rc'),
+        ...         local_path=tmpdir)
+        Search paths:
+          missing (enforced)  ... ms  -       .../nope.rc
+          found    ... ms  local   .../.foo.rc
+        ...
+        Total: 2 keys, ... B, ... ms
+
+        >>> kf.rm(tmpdir, recursive=True, force=True)
+
+    """
+    start = time.time()
+    out = sys.stdout if out is None else out
+    if basename is None:
+        basename = kf.basename(sys.argv[0], ".py")
+    config_struct = kc._default_config_struct(basename, config_file,
+                                              local_path)
+
+    print("Search paths:", file=out)
+    for enforce, cascaded, fun in config_struct:
+        candidate = fun()
+        if candidate is None:
+            continue
+        stat_start = time.time()
+        exists = os.path.exists(candidate)
+        print("  %-7s  %s  %-6s  %s"
+              % ("found" if exists else
+                 "missing (enforced)" if enforce else "missing",
+                 _ms(time.time() - stat_start),
+                 cascaded or "-", candidate), file=out)
+
+    ## ``load()`` would fail on missing enforced files, but we want to
+    ## see what comes next.
+    filenames = kc._find_files(
+        [(False, cascaded, fun) for _enforce, cascaded, fun in config_struct],
+        raise_on_all_missing=False)
+    layers = []
+    for label, filename in filenames:
+        if not os.path.exists(filename):
+            continue
+        trials = []
+        try:
+            manager = kc.choose_cfg_manager(filename, report=trials)
+        except SyntaxError as e:
+            manager = e
+        print("Detection of %s:" % filename, file=out)
+        for name, elapsed, error in trials:
+            print("  %-12s  %-7s  %s%s"
+                  % (name, "failed" if error else "chosen", _ms(elapsed),
+                     ("  (%s: %s)" % (error.__class__.__name__,
+                                      str(error).splitlines()[0]
+                                      if str(error) else ""))
+                     if error else ""), file=out)
+        if isinstance(manager, Exception):
+            print("  error: %s" % manager, file=out)
+            continue
+        ## the chosen manager has already parsed the file
+        manager.unload()
+        load_start = time.time()
+        tree = manager._cfg
+        print("  %-12s           %s"
+              % ("reparse:", _ms(time.time() - load_start)), file=out)
+        layers.append((label, manager, tree))
+
+    print("Layer stack:", file=out)
+    total_keys = 0
+    total_size = 0
+    for label, manager, tree in layers:
+        keys = sum(1 for _ in kc._iter_leaves(tree))
+        size = kc._deep_sizeof(tree)
+        total_keys += keys
+        total_size += size
+        print("  %-6s  %s  %d keys  %s  %s"
+              % (label or "-", manager.__class__.__name__, keys,
+                 _human_size(size), manager._filename), file=out)
+    print("Total: %d keys, %s, %s"
+          % (total_keys, _human_size(total_size),
+             _ms(time.time() - start)), file=out)
+
+
+def bench_pickle(config_file, rounds=5, out=None):
+    """Print pickle size and round-trip time of a loaded ``Config``
+
+    Both ways of pickling config managers are measured: with parsed
+    values (the default) and with only the file reference. The
+    ``first read`` is the time of unpickling and reading one value,
+    where the latter reparses the file::
+
+        >>> import kids.file as kf
+        >>> cfgfile = kf.mk_tmp_file("[a]\\nb = 1\\n")
+
+        >>> bench_pickle(cfgfile, rounds=1)
+        Pickling Config of ...:
+          with values      ... B  dumps ... ms  loads ... ms  first read ... ms
+          reference only   ... B  dumps ... ms  loads ... ms  first read ... ms
+
+        >>> kf.rm(cfgfile)
+
+    """
+    out = sys.stdout if out is None else out
+    cfg = kc.Config(config_file)
+    first_key = next(iter(cfg), None)
+    print("Pickling Config of %s:" % config_file, file=out)
+    for label, pickle_data in (("with values", True),
+                               ("reference only", False)):
+        cfg._cfg_manager.pickle_data = pickle_data
+        dumps = loads = first_read = 0.0
+        for _ in range(rounds):
+            start = time.time()
+            data = pickle.dumps(cfg, pickle.HIGHEST_PROTOCOL)
+            dumps += time.time() - start
+            start = time.time()
+            copy = pickle.loads(data)
+            loads += time.time() - start
+            if first_key is not None:
+                copy.get(first_key)
+            first_read += time.time() - start
+        print("  %-15s  %s  dumps %s  loads %s  first read %s"
+              % (label, _human_size(len(data)), _ms(dumps / rounds),
+                 _ms(loads / rounds), _ms(first_read / rounds)), file=out)
+
+
+def bench_ini(config_file, rounds=5, out=None):
+    """Print parse throughput of ``IniCfg`` and ``configobj`` on a file
+
+        >>> import kids.file as kf
+        >>> cfgfile = kf.mk_tmp_file("[a]\\n[[x]]\\nb = 1, 2\\n")
+
+        >>> bench_ini(cfgfile, rounds=1)
+        Parsing ... (3 lines, 19 B):
+          IniCfg     ... ms  ... lines/s  ...
+          configobj  ...
+
+        >>> kf.rm(cfgfile)
+
+    """
+    out = sys.stdout if out is None else out
+    with open(config_file) as f:
+        text = f.read()
+    lines = text.count("\n") or 1
+    parsers = [("IniCfg", lambda: kc.IniCfg(config_file)._cfg)]
+    if kc.configobj is not None:
+        parsers.append(("configobj",
+                        lambda: kc.configobj.ConfigObj(config_file)))
+    print("Parsing %s (%d lines, %s):"
+          % (config_file, lines, _human_size(len(text))), file=out)
+    for label, parse in parsers:
+        elapsed = 0.0
+        for _ in range(rounds):
+            start = time.time()
+            parse()
+            elapsed += time.time() - start
+        elapsed = max(elapsed / rounds, 1e-9)
+        print("  %-9s  %s  %d lines/s  %s/s"
+              % (label, _ms(elapsed), lines / elapsed,
+                 _human_size(len(text) / elapsed)), file=out)
+    if kc.configobj is None:
+        print("  configobj  not installed", file=out)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m kids.cfg")
+    commands = parser.add_subparsers(dest="command")
+    cmd = commands.add_parser(
+        "profile",
+        help="show where time is spent when loading config files.")
+    cmd.add_argument("--basename", default=None)
+    cmd.add_argument("--config-file", default=None)
+    cmd.add_argument("--local-path", default=None)
+    cmd.add_argument("--pstats", metavar="FILE", default=None,
+                     help="dump cProfile statistics of the load in FILE.")
+    cmd = commands.add_parser(
+        "bench-pickle",
+        help="measure pickle size and round-trip time of a config file.")
+    cmd.add_argument("config_file")
+    cmd.add_argument("--rounds", type=int, default=5)
+    cmd = commands.add_parser(
+        "bench-ini",
+        help="compare INI parse throughput of IniCfg and configobj.")
+    cmd.add_argument("config_file")
+    cmd.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args(argv)
+    if args.command == "bench-pickle":
+        bench_pickle(args.config_file, rounds=args.rounds)
+        return 0
+    if args.command == "bench-ini":
+        bench_ini(args.config_file, rounds=args.rounds)
+        return 0
+    if args.command != "profile":
+        parser.print_help()
+        return 1
+
+    kwargs = dict(basename=args.basename, config_file=args.config_file,
+                  local_path=args.local_path)
+    if args.pstats:
+        import cProfile
+        profiler = cProfile.Profile()
+        profiler.runcall(profile, **kwargs)
+        profiler.dump_stats(args.pstats)
+        print("cProfile statistics written to %r." % args.pstats)
+    else:
+        profile(**kwargs)
+    return 0
@@ -0,0 +1,135 @@
+# -*- coding: utf-8 -*-
+"""Sorted index of dotted key paths supporting glob queries
+
+A ``KeyIndex`` keeps the paths of the values of a config tree sorted,
+so that queries only scan the paths sharing the literal start of the
+pattern::
+
+    >>> idx = KeyIndex([('db', 'host'), ('db', 'timeout'),
+    ...                 ('tenants', 'a', 'quota', 'disk'),
+    ...                 ('tenants', 'b', 'quota', 'cpu'),
+    ...                 ('http', 'timeout')])
+    >>> len(idx)
+    5
+    >>> idx.find("*.timeout")
+    ['db.timeout', 'http.timeout']
+
+A pattern also matches all paths under the ones it matches::
+
+    >>> idx.find("tenants.*.quota")
+    ['tenants.a.quota.disk', 'tenants.b.quota.cpu']
+    >>> idx.count("db")
+    2
+
+Paths are counted, so that one index can be shared by several trees,
+a path being indexed as long as one tree has it::
+
+    >>> idx.add(('db', 'host'))
+    >>> idx.remove(('db', 'host'))
+    >>> idx.find("db.host")
+    ['db.host']
+    >>> idx.remove(('db', 'host'))
+    >>> idx.find("db.host")
+    []
+
+Removing a path that is not indexed does nothing::
+
+    >>> idx.remove(('db', 'host'))
+    >>> len(idx)
+    4
+
+"""
+
+import bisect
+import fnmatch
+
+
+_WILDCARDS = "*?["
+
+
+def _literal_start(pattern):
+    """Return the part of ``pattern`` before its first wildcard"""
+    for i, char in enumerate(pattern):
+        if char in _WILDCARDS:
+            return pattern[:i]
+    return pattern
+
+
+class KeyIndex(object):
+    """Counted set of dotted paths kept sorted"""
+
+    def __init__(self, paths=(), sep="."):
+        self._sep = sep
+        self._counts = {}
+        for path in paths:
+            path = self._format(path)
+            self._counts[path] = self._counts.get(path, 0) + 1
+        self._paths = sorted(self._counts)
+
+    def _format(self, path):
+        return self._sep.join(str(k) for k in path)
+
+    def __len__(self):
+        return len(self._paths)
+
+    def __contains__(self, path):
+        return self._format(path) in self._counts
+
+    def add(self, path):
+        path = self._format(path)
+        count = self._counts.get(path, 0)
+        if not count:
+            bisect.insort(self._paths, path)
+        self._counts[path] = count + 1
+
+    def remove(self, path):
+        path = self._format(path)
+        count = self._counts.pop(path, 0)
+        if not count:
+            return
+        if count > 1:
+            self._counts[path] = count - 1
+            return
+        del self._paths[bisect.bisect_left(self._paths, path)]
+
+    def _range(self, start, stop=None):
+        """Return bounds of paths beginning with ``start``"""
+        lo = bisect.bisect_left(self._paths, start)
+        if stop is None:
+            hi = lo
+            while hi < len(self._paths) and \
+                      self._paths[hi].startswith(start):
+                hi += 1
+            return lo, hi
+        return lo, bisect.bisect_left(self._paths, stop)
+
+    def _under(self, path):
+        """Return bounds of ``path`` and the paths under it"""
+        ## ``chr(ord(sep) + 1)`` is sorted right after all paths
+        ## beginning with ``path + sep``.
+        lo, hi = self._range(path + self._sep,
+                             path + chr(ord(self._sep) + 1))
+        return lo, hi, int(path in self._counts)
+
+    def find(self, pattern=None):
+        """Return sorted paths matching ``pattern`` or under them"""
+        if pattern is None:
+            return list(self._paths)
+        literal = _literal_start(pattern)
+        if literal == pattern:
+            lo, hi, exact = self._under(pattern)
+            return ([pattern] if exact else []) + self._paths[lo:hi]
+        lo, hi = self._range(literal)
+        under = pattern + self._sep + "*"
+        return [path for path in self._paths[lo:hi]
+                if fnmatch.fnmatchcase(path, pattern) or
+                fnmatch.fnmatchcase(path, under)]
+
+    def count(self, pattern=None):
+        """Return number of paths ``find(pattern)`` would return"""
+        if pattern is None:
+            return len(self._paths)
+        if _literal_start(pattern) == pattern:
+            lo, hi, exact = self._under(pattern)
+            return hi - lo + exact
+        return len(self.find(pattern))
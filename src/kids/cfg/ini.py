@@ -0,0 +1,293 @@
+# -*- coding: utf-8 -*-
+"""Built-in parser and writer of the ConfigObj INI dialect
+
+Values are read in one pass over the lines, building plain dicts::
+
+    >>> from pprint import pprint as pp
+
+    >>> pp(loads('''
+    ... name = foo  # comment
+    ... [a]
+    ... [[x]]
+    ... foo = 1
+    ... [b]
+    ... bar = 2, "3, 4"
+    ... '''))
+    {'a': {'x': {'foo': '1'}}, 'b': {'bar': ['2', '3, 4']}, 'name': 'foo'}
+
+As with ``configobj``, all values are strings or lists of strings,
+and lines that are neither a section nor a ``key = value`` are
+refused::
+
+    >>> loads("a:\\n    b: 1")
+    Traceback (most recent call last):
+    ...
+    ParseError: Invalid line 'a:'
+
+ConfigParser-like ``%(name)s`` interpolation of ``configobj`` is not
+supported. Comments and blank lines are not kept, so they are lost
+when the values are written back.
+
+``dumps()`` writes the same dialect back::
+
+    >>> print(dumps({'a': {'x': {'foo': '1'}}, 'name': 'foo',
+    ...              'b': {'bar': ['2', '3, 4']}}).strip())
+    name = foo
+    [a]
+    [[x]]
+    foo = 1
+    [b]
+    bar = 2, "3, 4"
+
+
+Compatibility with ``configobj``
+================================
+
+When ``configobj`` is installed, here is how the two parsers are
+checked to agree, including on what they refuse::
+
+    >>> def same_as_configobj(text):
+    ...     try:
+    ...         import configobj
+    ...     except ImportError:
+    ...         return True
+    ...     results = []
+    ...     for parse in (loads,
+    ...                   lambda t: configobj.ConfigObj(
+    ...                       t.splitlines(), interpolation=False).dict()):
+    ...         try:
+    ...             results.append(parse(text))
+    ...         except Exception:
+    ...             results.append("error")
+    ...     return results[0] == results[1]
+
+    >>> q3 = '"' * 3
+    >>> corpus = [
+    ...     "a = 1", "a=1", "  a  =  1  ", "a = x # c", "# comment\\n\\na = 1",
+    ...     "a = 'q # x'", 'a = "x"  # c', "a = it's", "k = v=w",
+    ...     "a =", 'a = ""', "a = b\\tc",
+    ...     "a = b, c", "a = b,", "a = ,", "a = 1, 'b, c' ,d",
+    ...     '"k k" = v', "'k=k' = v",
+    ...     "a = '''l1\\nl2'''", "a = '''x''' # c", "a = %sx%s" % (q3, q3),
+    ...     '[ s ]\\nb=1', "[a] # c\\nk = 1", "  [a]\\n    [[b]]\\n  k=1",
+    ...     "[a]\\nk=1\\n[b]\\n[[c]]\\nz=2\\n[[d]]\\n[e]",
+    ...     "k = 1\\n[a]\\n[[b]]\\n[[[c]]]\\n[d]\\n[[e]]",
+    ...     "[a]\\n[[x]]\\nfoo = 1\\n[b]\\nbar = 2",
+    ...     ## refused
+    ...     "a", "= v", "a:\\n    b: 1", "- a\\n- b", "a = 'x' y",
+    ...     "a = x, , y", "a = , ,", "a = 'x", "a = " + q3 + "x",
+    ...     "a = 1\\na = 2", "[a]\\n[a]", "[a]\\n[[[b]]]", "[a]]", "[]",
+    ... ]
+    >>> [text for text in corpus if not same_as_configobj(text)]
+    []
+
+"""
+
+import re
+
+from kids.data import dct
+
+
+try:
+    basestring
+except NameError:  ## pragma: no cover
+    basestring = str
+
+
+class ParseError(SyntaxError):
+    """Raised on text not following the INI dialect"""
+
+    def __init__(self, msg, lineno):
+        super(ParseError, self).__init__(msg)
+        self.lineno = lineno
+
+
+_SECTION = re.compile(r'^((?:\[\s*)+)("\s*\S.*?\s*"|\'\s*\S.*?\s*\'|'
+                      r'[^\'"\s].*?)((?:\s*\])+)\s*(?:#.*)?$')
+_QUOTED_KEY = re.compile(r'^(".*?"|\'.*?\')\s*=\s*(.*)$')
+_ITEM = re.compile(r'\s*("[^"]*"|\'[^\']*\'|[^\'",#\s][^,#]*?|)'
+                   r'\s*(,|#.*$|$)')
+_TRIPLE = ('"""', "'''")
+_has_special = re.compile(r'[\'",#]').search
+
+
+def _unquote(text):
+    if text[:1] in ('"', "'"):
+        return text[1:-1]
+    return text
+
+
+def _parse_value(value, lineno):
+    """Return string or list of strings of a one line value"""
+    if not _has_special(value):
+        return value
+    items = []
+    pos = 0
+    while True:
+        match = _ITEM.match(value, pos)
+        if match is None:
+            raise ParseError("Parse error in value", lineno)
+        items.append(match.group(1))
+        if match.group(2) != ",":
+            break
+        pos = match.end()
+    if len(items) == 1:
+        return _unquote(items[0])
+    if items == ["", ""]:  ## a lone comma is the empty list
+        return []
+    if items[-1] == "":
+        items.pop()
+    if "" in items:
+        raise ParseError("Parse error in value", lineno)
+    return [_unquote(item) for item in items]
+
+
+def _parse_multiline(value, lines, lineno):
+    """Return triple quoted value and number of lines it spans"""
+    quote = value[:3]
+    end = value.find(quote, 3)
+    spanned = 0
+    if end == -1:
+        parts = [value[3:]]
+        while end == -1:
+            if lineno + spanned >= len(lines):
+                raise ParseError("Unterminated triple-quoted value",
+                                 lineno)
+            line = lines[lineno + spanned]
+            spanned += 1
+            end = line.find(quote)
+            parts.append(line if end == -1 else line[:end])
+        text = "\n".join(parts)
+        rest = line[end + 3:]
+    else:
+        text = value[3:end]
+        rest = value[end + 3:]
+    rest = rest.strip()
+    if rest and not rest.startswith("#"):
+        raise ParseError("Parse error in value", lineno)
+    return text, spanned
+
+
+def loads(text):
+    """Return tree of plain dicts of INI ``text``"""
+    root = {}
+    stack = [root]  ## sections from root to current one
+    lines = text.splitlines()
+    lineno = 0
+    while lineno < len(lines):
+        raw = lines[lineno].lstrip()
+        line = raw.rstrip()
+        lineno += 1
+        if not line or line[0] == "#":
+            continue
+        match = _SECTION.match(line) if line[0] == "[" else None
+        if match is not None:
+            depth = match.group(1).count("[")
+            if depth != match.group(3).count("]"):
+                raise ParseError("Cannot compute the section depth", lineno)
+            if depth > len(stack):
+                raise ParseError("Section too nested", lineno)
+            name = _unquote(match.group(2))
+            del stack[depth:]
+            parent = stack[-1]
+            if name in parent:
+                raise ParseError("Duplicate section name", lineno)
+            section = parent[name] = {}
+            stack.append(section)
+            continue
+        ## trailing spaces are part of triple quoted values
+        if raw[0] in "'\"":
+            match = _QUOTED_KEY.match(raw)
+            if match is None:
+                raise ParseError("Invalid line %r" % line, lineno)
+            key, value = match.group(1)[1:-1], match.group(2)
+        else:
+            key, sep, value = raw.partition("=")
+            key = key.rstrip()
+            if not sep or not key:
+                raise ParseError("Invalid line %r" % line, lineno)
+            value = value.lstrip()
+        section = stack[-1]
+        if key in section:
+            raise ParseError("Duplicate keyword name", lineno)
+        if value[:3] in _TRIPLE:
+            section[key], spanned = _parse_multiline(value, lines, lineno)
+            lineno += spanned
+        else:
+            section[key] = _parse_value(value.rstrip(), lineno)
+    return root
+
+
+def load(filename):
+    with open(filename) as f:
+        return loads(f.read())
+
+
+def _quote(value, in_list=False):
+    value = value if isinstance(value, basestring) else str(value)
+    if not value:
+        return '""'
+    multiline = "\n" in value
+    if not multiline and value == value.strip() and \
+           not _has_special(value):
+        return value
+    if not multiline:
+        for quote in ('"', "'"):
+            if quote not in value:
+                return quote + value + quote
+    if not in_list:
+        for quote in _TRIPLE:
+            if quote not in value and not value.endswith(quote[0]):
+                return quote + value + quote
+    raise ValueError("Can't quote value %r." % value)
+
+
+def _dump_value(value):
+    if isinstance(value, (list, tuple)):
+        if not value:
+            return ","
+        if len(value) == 1:
+            return _quote(value[0], in_list=True) + ","
+        return ", ".join(_quote(v, in_list=True) for v in value)
+    return _quote(value)
+
+
+def _dump_key(key):
+    key = key if isinstance(key, basestring) else str(key)
+    if "\n" in key:
+        raise ValueError("Can't write multiline key %r." % key)
+    if key and key == key.strip() and \
+           not any(char in key for char in "=#[]\"'"):
+        return key
+    for quote in ('"', "'"):
+        if quote not in key:
+            return quote + key + quote
+    raise ValueError("Can't quote key %r." % key)
+
+
+def _dump(tree, depth, lines):
+    sections = []
+    for key in tree:
+        value = tree[key]
+        if dct.is_dict_like(value):
+            sections.append(key)
+            continue
+        lines.append("%s = %s" % (_dump_key(key), _dump_value(value)))
+    for key in sections:
+        if not str(key).strip():
+            raise ValueError("Can't write section named %r." % key)
+        lines.append("%s%s%s" % ("[" * (depth + 1), _dump_key(key),
+                                 "]" * (depth + 1)))
+        _dump(tree[key], depth + 1, lines)
+
+
+def dumps(tree):
+    """Return INI text of ``tree``"""
+    lines = []
+    _dump(tree, 0, lines)
+    return "".join(line + "\n" for line in lines)
+
+
+def save(filename, tree):
+    with open(filename, 'w') as f:
+        f.write(dumps(tree))
@@ -0,0 +1,234 @@
+# -*- coding: utf-8 -*-
+"""Memoized ``${section.key}`` interpolation of config values
+
+An ``Interpolator`` resolves references in string values against a
+tree of raw values::
+
+    >>> tree = {'db': {'host': 'example.com', 'port': 5432},
+    ...         'url': 'pg://${db.host}:${db.port}/',
+    ...         'port': '${db.port}',
+    ...         'price': '$$5'}
+    >>> itp = Interpolator(lambda: tree)
+
+    >>> itp.resolve(('url', ), tree['url'])
+    'pg://example.com:5432/'
+
+A value made of only one reference gets the referenced value
+untouched, and ``$$`` is the escape for ``$``::
+
+    >>> itp.resolve(('port', ), tree['port'])
+    5432
+    >>> itp.resolve(('price', ), tree['price'])
+    '$5'
+
+Resolved values are memoized, and a dependency graph is kept so that
+when a value is changed, only the values that depend on it are
+forgotten::
+
+    >>> tree['db']['host'] = 'localhost'
+    >>> itp.written(('db', 'host'))
+    >>> itp.resolve(('url', ), tree['url'])
+    'pg://localhost:5432/'
+
+Cycles are detected when the interpolator is created, and when values
+are written::
+
+    >>> tree['db']['host'] = '${url}'
+    >>> itp.written(('db', 'host'))
+    Traceback (most recent call last):
+    ...
+    ValueError: Interpolation cycle: db.host -> url -> db.host
+
+    >>> Interpolator(lambda: {'a': '${b}', 'b': '${a}'})
+    Traceback (most recent call last):
+    ...
+    ValueError: Interpolation cycle: a -> b -> a
+
+"""
+
+import re
+
+from kids.data import dct
+
+
+try:
+    basestring
+except NameError:  ## pragma: no cover
+    basestring = str
+
+
+_REF = re.compile(r'\$(\$|\{([^}]*)\})')
+
+
+def _refs(value, sep):
+    return [tuple(m.group(2).split(sep))
+            for m in _REF.finditer(value) if m.group(2) is not None]
+
+
+def _walk(tree, path):
+    for key in path:
+        tree = tree[key]
+    return tree
+
+
+def _prefixes(path):
+    return [path[:i] for i in range(len(path))]
+
+
+def _track(under, path):
+    """Register ``path`` in ``under``, mapping prefixes to paths under them"""
+    for prefix in _prefixes(path):
+        under.setdefault(prefix, set()).add(path)
+
+
+def _related(under, path, paths):
+    """Return ones of ``paths`` being ``path``, a prefix of it or under it
+
+    Only the prefixes of ``path`` and the paths registered under it in
+    ``under`` are looked at, not all of ``paths``.
+
+    """
+    related = [p for p in _prefixes(path) + [path] if p in paths]
+    related.extend(p for p in under.get(path, ()) if p in paths)
+    return related
+
+
+class Interpolator(object):
+    """Resolves references in values of tree returned by ``get_root``"""
+
+    def __init__(self, get_root, sep="."):
+        self._get_root = get_root
+        self._sep = sep
+        self._memo = {}        ## path -> (raw value, resolved value)
+        self._dependents = {}  ## referenced path -> set of paths
+        ## path -> memoized or referenced paths under it
+        self._under = {}
+        self._resolving = set()
+        self.check()
+
+    def _format(self, path):
+        return self._sep.join(str(k) for k in path)
+
+    def check(self):
+        """Scan all values for references and check there are no cycle"""
+        self._graph = {}
+        self._graph_under = {}  ## path -> paths of ``_graph`` under it
+        self._scan(self._get_root(), ())
+        self._check_cycles(list(self._graph))
+
+    def _scan(self, value, path):
+        if dct.is_dict_like(value):
+            for key in value:
+                self._scan(value[key], path + (key, ))
+        elif isinstance(value, basestring) and "$" in value:
+            refs = _refs(value, self._sep)
+            if refs:
+                self._graph[path] = refs
+                _track(self._graph_under, path)
+
+    def _check_cycles(self, starts):
+        done = set()
+
+        def visit(path, stack):
+            if path in stack:
+                cycle = stack[stack.index(path):] + [path]
+                raise ValueError(
+                    "Interpolation cycle: %s"
+                    % " -> ".join(self._format(p) for p in cycle))
+            if path in done:
+                return
+            for ref in self._graph.get(path, []):
+                visit(ref, stack + [path])
+            done.add(path)
+
+        for path in starts:
+            visit(path, [])
+
+    def resolve(self, path, raw):
+        """Return interpolated value of ``raw`` found at ``path``"""
+        if not isinstance(raw, basestring) or "$" not in raw:
+            return raw
+        entry = self._memo.get(path)
+        if entry is not None and entry[0] is raw:
+            return entry[1]
+        if path in self._resolving:
+            raise ValueError("Interpolation cycle on %s"
+                             % self._format(path))
+        self._resolving.add(path)
+        try:
+            value = self._interpolate(path, raw)
+        finally:
+            self._resolving.discard(path)
+        self._memo[path] = (raw, value)
+        _track(self._under, path)
+        return value
+
+    def _get(self, ref, path):
+        try:
+            raw = _walk(self._get_root(), ref)
+        except (KeyError, TypeError):
+            raise KeyError("Unresolved reference ${%s} in %s."
+                           % (self._format(ref), self._format(path)))
+        self._dependents.setdefault(ref, set()).add(path)
+        _track(self._under, ref)
+        value = self.resolve(ref, raw)
+        ## also remember plain values to detect their changes on reload
+        self._memo.setdefault(ref, (raw, value))
+        return value
+
+    def _interpolate(self, path, raw):
+        match = _REF.match(raw)
+        if match and match.end() == len(raw) and match.group(2) is not None:
+            return self._get(tuple(match.group(2).split(self._sep)), path)
+
+        def repl(match):
+            if match.group(2) is None:
+                return "$"
+            return str(self._get(tuple(match.group(2).split(self._sep)),
+                                 path))
+        return _REF.sub(repl, raw)
+
+    def _invalidate(self, paths):
+        todo = list(paths)
+        while todo:
+            path = todo.pop()
+            for memoized in _related(self._under, path, self._memo):
+                del self._memo[memoized]
+            for ref in _related(self._under, path, self._dependents):
+                todo.extend(self._dependents.pop(ref))
+
+    def written(self, path):
+        """To be called when value at ``path`` was changed or removed"""
+        for known in _related(self._graph_under, path, self._graph):
+            del self._graph[known]
+        try:
+            value = _walk(self._get_root(), path)
+        except (KeyError, TypeError):
+            pass
+        else:
+            self._scan(value, path)
+        self._invalidate([path])
+        self._check_cycles(_related(self._graph_under, path, self._graph))
+
+    def reloaded(self):
+        """To be called when the whole tree was parsed again
+
+        Only memoized values whose raw value changed, and values
+        depending on them, are forgotten.
+
+        """
+        root = self._get_root()
+        changed = []
+        for path, (raw, _value) in list(self._memo.items()):
+            try:
+                new = _walk(root, path)
+            except (KeyError, TypeError):
+                changed.append(path)
+                continue
+            if new != raw:
+                changed.append(path)
+            else:
+                ## keep the memoized value for the new raw object
+                self._memo[path] = (new, _value)
+        self._invalidate(changed)
+        self.check()